@@ -15,41 +15,47 @@ Phase 2: Flask → FastAPI migration.
 import asyncio
 import base64
 import hashlib
-import json
 import logging
 import math
 import os
 import re
-import time
+import threading
 import urllib.parse
 import uuid
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 from html import escape
+from itertools import groupby
+from operator import itemgetter
 
 import httpx
-from anthropic import AsyncAnthropic
+import orjson
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.responses import Response as StarletteResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, case, cast, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, load_only
 from starlette.concurrency import run_in_threadpool
 
 from auth import (
-    COOKIE_NAME,
-    TOKEN_TTL_H,
+    CurrentUser,
     auth_router,
     check_user_rate_limit,
     get_current_user,
+    set_auth_cookie,
 )
 from clients import clients_router
 from database import engine, get_db, SessionLocal
 from ephemeris import format_ephemeris_block, get_daily_ephemeris
-from models import Client, GearProfile, StaffUser, Trip, db
+from models import Client, GearProfile, Trip, db
 from prompts import (
     build_location_scout_system_prompt,
     build_location_scout_user_prompt,
@@ -59,6 +65,7 @@ from prompts import (
     build_photo_scout_user_prompt,
     build_shot_planner_system_prompt,
     build_shot_planner_user_prompt,
+    build_trip_context_blocks,
 )
 from redis_client import get_redis
 from schemas import FinalizeRequest, GenerateRequest, GearProfileCreate, GearProfileUpdate, ReplaceRequest
@@ -92,9 +99,22 @@ async def _lifespan(app: FastAPI):
     properly closed even when the process exits abnormally.
     """
     global _http_client
+    # HTTP/2 multiplexes the verify_places_batch burst over one TLS connection
+    # per Google host; retries=1 absorbs transient connect failures. Pool
+    # settings live on the transport because an explicit transport replaces
+    # the client-level http2/limits arguments.
     _http_client = httpx.AsyncClient(
-        timeout=10,
-        headers={'User-Agent': 'TripGuideApp/1.0'},
+        timeout   = httpx.Timeout(10.0, connect=3.0),
+        headers   = {'User-Agent': 'TripGuideApp/1.0'},
+        transport = httpx.AsyncHTTPTransport(
+            http2   = True,
+            retries = 1,
+            limits  = httpx.Limits(
+                max_keepalive_connections = 50,
+                max_connections           = 100,
+                keepalive_expiry          = 60,
+            ),
+        ),
     )
     await run_in_threadpool(_init_db)
     r = get_redis()
@@ -104,7 +124,9 @@ async def _lifespan(app: FastAPI):
         logger.warning('Redis unavailable — using in-memory fallbacks (set REDIS_URL to enable)')
     yield
     await _http_client.aclose()
-    logger.info('Application shutdown: HTTP client closed.')
+    await anthropic_client.close()
+    _html_pool.shutdown(wait=False)
+    logger.info('Application shutdown: HTTP clients closed.')
 
 
 app = FastAPI(title='Trip Master API', docs_url=None, redoc_url=None, lifespan=_lifespan)
@@ -134,12 +156,19 @@ else:
     # needed unless you have a separate frontend domain.
     _cors_origins = []
 
+# Sidecar metadata for /finalize when the guide is returned as raw text/html
+_FINALIZE_META_HEADERS = (
+    'X-Location', 'X-Duration', 'X-Photo-Count', 'X-Restaurant-Count',
+    'X-Attraction-Count', 'X-Model',
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_cors_origins,
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=list(_FINALIZE_META_HEADERS),
 )
 
 # ── Security headers ──────────────────────────────────────────────────────────
@@ -187,18 +216,11 @@ async def security_headers(request: Request, call_next):
 # ── Sliding JWT cookie ────────────────────────────────────────────────────────
 @app.middleware('http')
 async def slide_auth_cookie(request: Request, call_next):
-    """Re-issue the auth cookie with a fresh TTL after each authenticated request."""
+    """Re-issue the auth cookie when get_current_user minted a refreshed token."""
     response = await call_next(request)
     token = getattr(request.state, 'slide_token', None)
     if token:
-        response.set_cookie(
-            COOKIE_NAME, token,
-            httponly=True,
-            samesite='lax',
-            secure=(os.getenv('FLASK_ENV') == 'production'),
-            max_age=TOKEN_TTL_H * 3600,
-            path='/',
-        )
+        set_auth_cookie(response, token)
     return response
 
 
@@ -206,7 +228,7 @@ async def slide_auth_cookie(request: Request, call_next):
 # FastAPI's default shape is { "detail": "..." }; the frontend expects "error".
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(status_code=exc.status_code, content={'error': exc.detail})
+    return JSONResponse(status_code=exc.status_code, content={'error': exc.detail}, headers=exc.headers)
 
 
 # ── Router registration ───────────────────────────────────────────────────────
@@ -227,10 +249,19 @@ SCOUT_MODEL_LABEL = os.getenv('SCOUT_MODEL_LABEL', 'Claude Haiku 4.5')
 SHOT_MODEL        = os.getenv('SHOT_MODEL',        'claude-sonnet-4-5-20250929')
 SHOT_MODEL_LABEL  = os.getenv('SHOT_MODEL_LABEL',  'Claude Sonnet 4.5')
 
+# Small jobs with no client profile gain little from Sonnet's shot planning, so
+# Phase 2 runs on SCOUT_MODEL when duration × photos_per_day (+3 if a client
+# profile is attached) is below this threshold. Set to 0 to always use SHOT_MODEL.
+SIMPLE_JOB_THRESHOLD = int(os.getenv('SIMPLE_JOB_THRESHOLD', '4'))
+
 # Per-call timeout (seconds) for all Claude API calls in the two-phase scout.
 # Each call is small (max_tokens 1 000–1 200), so 45 s is very generous.
 CLAUDE_CALL_TIMEOUT = float(os.getenv('CLAUDE_CALL_TIMEOUT', '45'))
 
+# Scout calls are user-facing (the UI polls the job), so let them use Priority
+# Tier capacity when the account has it. 'standard_only' opts out.
+SCOUT_SERVICE_TIER = os.getenv('SCOUT_SERVICE_TIER', 'auto')
+
 PHOTOS_PER_DAY      = 3
 RESTAURANTS_PER_DAY = 3
 ATTRACTIONS_PER_DAY = 4
@@ -253,6 +284,7 @@ SCOUT_RETRY_DELAY = 1.0
 
 MAX_EXCLUDE_NAME_LEN = 100
 MAX_EXCLUDE_LIST_LEN = 50
+_WS_RE = re.compile(r'\s+')
 
 COLOR_PALETTES = {
     'barcelona': {'primary': '#c41e3a', 'accent': '#f4a261', 'secondary': '#2a9d8f', 'neutral': '#f5e6d3'},
@@ -265,11 +297,16 @@ COLOR_PALETTES = {
 # In-memory fallbacks (used when Redis is unavailable)
 # ---------------------------------------------------------------------------
 
-_cache: dict         = {}
-_session_store: dict = {}
-_jobs: dict          = {}   # job-state fallback when Redis is unreachable
-
+# Bounded TTL caches so a Redis outage can't grow memory without limit.
+# TTLCache expires entries on access; it is not thread-safe, and the
+# threadpool paths touch these too, so every access goes through _local_lock.
 JOB_TTL_SECONDS = 3600      # 1 hour — same as session TTL
+LOCAL_CACHE_MAX = int(os.getenv('LOCAL_CACHE_MAX', '10000'))
+
+_cache         = TTLCache(maxsize=LOCAL_CACHE_MAX, ttl=CACHE_TTL_SECONDS)
+_session_store = TTLCache(maxsize=LOCAL_CACHE_MAX, ttl=SESSION_TTL_SECONDS)
+_jobs          = TTLCache(maxsize=LOCAL_CACHE_MAX, ttl=JOB_TTL_SECONDS)   # job-state fallback
+_local_lock    = threading.Lock()
 
 # ---------------------------------------------------------------------------
 # HTTP client singleton (shared across requests)
@@ -281,7 +318,30 @@ _http_client: httpx.AsyncClient | None = None
 # Anthropic client
 # ---------------------------------------------------------------------------
 
-anthropic_client = AsyncAnthropic()
+# Its own HTTP/2 pool: the SDK's default client is HTTP/1.1, so concurrent
+# Phase 2 / replace calls each held a separate TLS connection. Kept apart from
+# _http_client because the SDK manages its own timeouts and retries.
+anthropic_client = AsyncAnthropic(
+    http_client=DefaultAsyncHttpxClient(
+        http2  = True,
+        limits = httpx.Limits(
+            max_keepalive_connections = 20,
+            max_connections           = 100,
+            keepalive_expiry          = 60,
+        ),
+    ),
+)
+
+
+def _cached_system(text: str) -> list[dict]:
+    """Wrap a system prompt as a single prompt-cached content block.
+
+    The cache prefix covers tools + system, so repeated calls with the same
+    prompt (every Phase 1 day, every Phase 2 location in one job) reuse the
+    processed input tokens for ~5 minutes. Prompts below the model's minimum
+    cacheable length are simply processed uncached.
+    """
+    return [{'type': 'text', 'text': text, 'cache_control': {'type': 'ephemeral'}}]
 
 # ---------------------------------------------------------------------------
 # Startup / shutdown
@@ -296,9 +356,23 @@ def _init_db():
 # Cache helpers (Redis + in-memory fallback)
 # ---------------------------------------------------------------------------
 
+# orjson emits compact UTF-8 bytes, which redis-py writes as-is; reads come
+# back as str (decode_responses=True) and orjson.loads accepts either.
+_dumps = orjson.dumps
+_loads = orjson.loads
+
+
 def _cache_key(*args) -> str:
-    raw = json.dumps(args, sort_keys=True)
-    return hashlib.md5(raw.encode()).hexdigest()
+    # OPT_SORT_KEYS sorts nested dicts too, so profile dicts can be passed in
+    # directly and still produce a stable key.
+    return hashlib.md5(orjson.dumps(args, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _profile_hash(profile: dict | None) -> str:
+    """Short stable digest of a client / gear profile dict for cache keys."""
+    return hashlib.blake2b(
+        orjson.dumps(profile or {}, option=orjson.OPT_SORT_KEYS), digest_size=12,
+    ).hexdigest()
 
 
 def _get_cached(key: str):
@@ -307,52 +381,115 @@ def _get_cached(key: str):
         try:
             raw = r.get(f'cache:{key}')
             if raw is not None:
-                return json.loads(raw)
+                return _loads(raw)
         except Exception as exc:
             logger.warning('Redis cache GET error: %s', exc)
         return None
-    entry = _cache.get(key)
-    if entry and (time.time() - entry[0]) < CACHE_TTL_SECONDS:
-        return entry[1]
-    return None
+    with _local_lock:
+        return _cache.get(key)
 
 
 def _set_cached(key: str, value) -> None:
     r = get_redis()
     if r is not None:
         try:
-            r.setex(f'cache:{key}', CACHE_TTL_SECONDS, json.dumps(value))
+            r.setex(f'cache:{key}', CACHE_TTL_SECONDS, _dumps(value))
         except Exception as exc:
             logger.warning('Redis cache SET error: %s', exc)
         return
-    _cache[key] = (time.time(), value)
+    with _local_lock:
+        _cache[key] = value
 
 
 # ---------------------------------------------------------------------------
-# Session helpers (Redis + in-memory fallback)
+# Trip row helpers
 # ---------------------------------------------------------------------------
 
-def _evict_sessions() -> None:
-    r = get_redis()
-    if r is not None:
-        return
-    cutoff  = time.time() - SESSION_TTL_SECONDS
-    expired = [k for k, v in _session_store.items() if v.get('ts', 0) < cutoff]
-    for k in expired:
-        del _session_store[k]
-    if expired:
-        logger.info('Evicted %d expired review session(s)', len(expired))
+# Scalar columns /finalize and /replace read off a trip. _find_trip loads only
+# these plus the raw_* blobs the caller names, so final_html (often megabytes)
+# and unrelated JSON arrays never leave the database.
+_TRIP_SCALAR_COLS = (
+    Trip.location, Trip.duration, Trip.budget, Trip.distance,
+    Trip.photo_interests, Trip.cuisines, Trip.attraction_cats,
+    Trip.accommodation, Trip.client_id, Trip.updated_at,
+)
+
+_RAW_FIELD_BY_TYPE = {
+    'photos':      'raw_photos',
+    'restaurants': 'raw_restaurants',
+    'attractions': 'raw_attractions',
+}
+
+
+def _find_trip(db_session: Session, trip_id: int | None, session_id: str | None,
+               *fields: str) -> Trip | None:
+    """Live trip by id, falling back to its review session id — in one query.
+
+    Only the scalar columns and the named JSON ``fields`` are loaded; anything
+    else is fetched lazily on first access.
+    """
+    conds = []
+    if trip_id is not None:
+        conds.append(Trip.id == int(trip_id))
+    if session_id:
+        conds.append(Trip.session_id == session_id)
+    if not conds:
+        return None
+    stmt = (
+        select(Trip)
+        .options(load_only(*_TRIP_SCALAR_COLS, *(getattr(Trip, f) for f in fields)))
+        .where(or_(*conds), Trip.is_deleted.is_(False))
+    )
+    if len(conds) == 2:
+        stmt = stmt.order_by(case((conds[0], 0), else_=1))   # prefer the id match
+    return db_session.scalars(stmt.limit(1)).first()
+
+
+# In-database "replace element idx of a JSON-array text column" per dialect,
+# so a single-item edit doesn't re-serialise the whole array in Python.
+_JSON_ARRAY_SET = {
+    'postgresql': lambda col, idx, val: cast(
+        func.jsonb_set(cast(col, JSONB), '{%d}' % idx, cast(val, JSONB), False), Text,
+    ),
+    'sqlite':     lambda col, idx, val: func.json_set(col, '$[%d]' % idx, func.json(val)),
+}
+
+
+# Parsed raw_* / colors columns keyed by (trip id, column, updated_at). Every
+# write to a trip bumps updated_at, so a changed row never hits a stale entry.
+# Results are shared — callers must copy before mutating.
+_trip_json_cache = LRUCache(maxsize=256)
+
 
+def _trip_json(trip: Trip, field: str, default):
+    """Decoded JSON column of a Trip row, memoised across requests."""
+    raw = getattr(trip, field)
+    if not raw:
+        return default
+    key = (trip.id, field, trip.updated_at)
+    with _local_lock:
+        parsed = _trip_json_cache.get(key)
+    if parsed is None:
+        parsed = _loads(raw)
+        with _local_lock:
+            _trip_json_cache[key] = parsed
+    return parsed
+
+
+# ---------------------------------------------------------------------------
+# Session helpers (Redis + in-memory fallback)
+# ---------------------------------------------------------------------------
 
 def _session_set(session_id: str, payload: dict) -> None:
     r = get_redis()
     if r is not None:
         try:
-            r.setex(f'session:{session_id}', SESSION_TTL_SECONDS, json.dumps(payload))
+            r.setex(f'session:{session_id}', SESSION_TTL_SECONDS, _dumps(payload))
             return
         except Exception as exc:
             logger.warning('Redis session SET error: %s — falling back to memory', exc)
-    _session_store[session_id] = {**payload, 'ts': time.time()}
+    with _local_lock:
+        _session_store[session_id] = payload
 
 
 def _session_get(session_id: str) -> dict | None:
@@ -361,17 +498,11 @@ def _session_get(session_id: str) -> dict | None:
         try:
             raw = r.get(f'session:{session_id}')
             if raw is not None:
-                return json.loads(raw)
+                return _loads(raw)
         except Exception as exc:
             logger.warning('Redis session GET error: %s — trying memory', exc)
-        entry = _session_store.get(session_id)
-        if entry and (time.time() - entry.get('ts', 0)) < SESSION_TTL_SECONDS:
-            return entry
-        return None
-    entry = _session_store.get(session_id)
-    if entry and (time.time() - entry.get('ts', 0)) < SESSION_TTL_SECONDS:
-        return entry
-    return None
+    with _local_lock:
+        return _session_store.get(session_id)
 
 
 # ---------------------------------------------------------------------------
@@ -383,11 +514,14 @@ def _job_set(job_id: str, payload: dict) -> None:
     r = get_redis()
     if r is not None:
         try:
-            r.setex(f'job:{job_id}', JOB_TTL_SECONDS, json.dumps(payload))
+            r.setex(f'job:{job_id}', JOB_TTL_SECONDS, _dumps(payload))
+            _job_notify(job_id)
             return
         except Exception as exc:
             logger.warning('Redis job SET error: %s', exc)
-    _jobs[job_id] = {**payload, '_ts': time.time()}
+    with _local_lock:
+        _jobs[job_id] = payload
+    _job_notify(job_id)
 
 
 def _job_get(job_id: str) -> dict | None:
@@ -396,21 +530,118 @@ def _job_get(job_id: str) -> dict | None:
         try:
             raw = r.get(f'job:{job_id}')
             if raw is not None:
-                return json.loads(raw)
+                return _loads(raw)
         except Exception as exc:
             logger.warning('Redis job GET error: %s', exc)
         return None
-    entry = _jobs.get(job_id)
-    if entry and (time.time() - entry.get('_ts', 0)) < JOB_TTL_SECONDS:
-        return {k: v for k, v in entry.items() if k != '_ts'}
+    with _local_lock:
+        entry = _jobs.get(job_id)
+    return dict(entry) if entry is not None else None
+
+
+# Idempotency for POST /generate: a retried or double-clicked request maps to
+# the job already running for it instead of paying for a second scout run.
+# Finished or failed jobs release their key, so a deliberate re-run still works.
+IDEM_TTL_SECONDS = 300
+_idem_jobs       = TTLCache(maxsize=LOCAL_CACHE_MAX, ttl=IDEM_TTL_SECONDS)
+
+
+def _job_in_flight(job_id: str | None) -> bool:
+    job = _job_get(job_id) if job_id else None
+    return job is not None and job.get('status') in ('pending', 'running')
+
+
+def _job_claim(idem_key: str, job_id: str) -> str | None:
+    """Bind idem_key to job_id unless an in-flight job holds it; return that job's id."""
+    r = get_redis()
+    if r is not None:
+        try:
+            key = f'idem:{idem_key}'
+            if r.set(key, job_id, nx=True, ex=IDEM_TTL_SECONDS):
+                return None
+            existing = r.get(key)
+            if _job_in_flight(existing):
+                return existing
+            r.setex(key, IDEM_TTL_SECONDS, job_id)
+            return None
+        except Exception as exc:
+            logger.warning('Redis idempotency SET error: %s', exc)
+    with _local_lock:
+        existing = _idem_jobs.get(idem_key)
+    if _job_in_flight(existing):
+        return existing
+    with _local_lock:
+        _idem_jobs[idem_key] = job_id
     return None
 
 
+# Long-poll wake-ups for GET /jobs/{id}?wait=N. Waiters park on the job's
+# event; any write to the job pops and sets it. Writers run on the event loop.
+# In multi-worker deployments the writer may live in another process, so
+# waiters also re-read the store every JOB_WAIT_SLICE seconds.
+JOB_WAIT_MAX   = 25
+JOB_WAIT_SLICE = 2.0
+_job_events: dict[str, asyncio.Event] = {}
+
+
+def _job_notify(job_id: str) -> None:
+    event = _job_events.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+async def _job_wait(job_id: str, job: dict, wait: float) -> dict | None:
+    """Hold until the job's status/progress/message changes or wait elapses."""
+    seen     = (job.get('status'), job.get('progress'), job.get('message'))
+    deadline = asyncio.get_running_loop().time() + wait
+    while True:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return job
+        event = _job_events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=min(remaining, JOB_WAIT_SLICE))
+        except asyncio.TimeoutError:
+            if _job_events.get(job_id) is event and not event.is_set():
+                del _job_events[job_id]
+        job = _job_get(job_id)
+        if job is None or (job.get('status'), job.get('progress'), job.get('message')) != seen:
+            return job
+
+
+# GET → merge → SETEX executed server-side: one round trip, and no window in
+# which two writers can overwrite each other's fields. Job records hold no
+# empty arrays before completion, so cjson's {} / [] ambiguity never bites.
+_JOB_MERGE_LUA = """
+local cur = redis.call('GET', KEYS[1])
+local merged = ARGV[2]
+if cur then
+    local rec = cjson.decode(cur)
+    for k, v in pairs(cjson.decode(ARGV[2])) do rec[k] = v end
+    merged = cjson.encode(rec)
+end
+redis.call('SETEX', KEYS[1], ARGV[1], merged)
+return 1
+"""
+_job_merge_script = None
+
+
 def _job_update(job_id: str, fields: dict) -> None:
-    """Merge fields into an existing job record (read → modify → write)."""
-    existing = _job_get(job_id) or {}
-    existing.update(fields)
-    _job_set(job_id, existing)
+    """Merge fields into an existing job record atomically."""
+    global _job_merge_script
+    r = get_redis()
+    if r is not None:
+        try:
+            if _job_merge_script is None:
+                _job_merge_script = r.register_script(_JOB_MERGE_LUA)
+            _job_merge_script(keys=[f'job:{job_id}'], args=[JOB_TTL_SECONDS, _dumps(fields)])
+            _job_notify(job_id)
+            return
+        except Exception as exc:
+            logger.warning('Redis job UPDATE error: %s', exc)
+    with _local_lock:
+        _jobs[job_id] = {**(_jobs.get(job_id) or {}), **fields}
+    _job_notify(job_id)
 
 
 # ---------------------------------------------------------------------------
@@ -418,19 +649,12 @@ def _job_update(job_id: str, fields: dict) -> None:
 # ---------------------------------------------------------------------------
 
 def get_color_palette(location: str) -> dict:
-    key = location.lower().split(',')[0].strip()
-    return COLOR_PALETTES.get(key, COLOR_PALETTES['default'])
-
-
+    # partition() allocates one head string instead of a full split() list
+    key = location.partition(',')[0].strip().lower()
+    return COLOR_PALETTES.get(key) or COLOR_PALETTES['default']
 
 
-def _haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    R = 6_371_000
-    φ1, φ2 = math.radians(lat1), math.radians(lat2)
-    Δφ = math.radians(lat2 - lat1)
-    Δλ = math.radians(lng2 - lng1)
-    a = math.sin(Δφ / 2) ** 2 + math.cos(φ1) * math.cos(φ2) * math.sin(Δλ / 2) ** 2
-    return 2 * R * math.asin(math.sqrt(a))
+_EARTH_RADIUS_M = 6_371_000
 
 
 def _format_distance(metres: float) -> str:
@@ -444,12 +668,18 @@ def _format_distance(metres: float) -> str:
 
 
 def _apply_distances(items: list, acc_lat: float, acc_lng: float) -> None:
+    # Haversine from one fixed origin: its radians and cosine are hoisted out
+    # of the loop, and the math functions are bound locally.
+    radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+    φ0, λ0 = radians(acc_lat), radians(acc_lng)
+    cos_φ0 = cos(φ0)
     for item in items:
         lat = item.get('_lat')
         lng = item.get('_lng')
         if lat is not None and lng is not None:
-            metres = _haversine_m(acc_lat, acc_lng, lat, lng)
-            item['travel_time'] = _format_distance(metres)
+            φ = radians(lat)
+            a = sin((φ - φ0) / 2) ** 2 + cos_φ0 * cos(φ) * sin((radians(lng) - λ0) / 2) ** 2
+            item['travel_time'] = _format_distance(2 * _EARTH_RADIUS_M * asin(sqrt(a)))
 
 
 # ---------------------------------------------------------------------------
@@ -550,6 +780,12 @@ async def _geocode_accommodation(address: str):
     """Look up lat/lng of accommodation address via Places API. Returns (lat, lng) or (None, None)."""
     if not PLACES_VERIFY_ENABLED or not address:
         return None, None
+    # The same accommodation is looked up by every /replace on a trip; only
+    # successful lookups are cached so a transient failure is retried.
+    key    = _cache_key('geo_v1', address.strip().lower())
+    cached = _get_cached(key)
+    if cached is not None:
+        return cached[0], cached[1]
     try:
         resp = await _http_client.post(
             PLACES_API_URL,
@@ -568,6 +804,7 @@ async def _geocode_accommodation(address: str):
         lat, lng = loc.get('latitude'), loc.get('longitude')
         if lat is not None and lng is not None:
             logger.info('Accommodation geocoded: %r → (%.5f, %.5f)', address[:60], lat, lng)
+            _set_cached(key, [float(lat), float(lng)])
             return float(lat), float(lng)
     except Exception as exc:
         logger.warning('Accommodation geocoding failed for %r: %s', address[:60], exc)
@@ -593,6 +830,15 @@ async def _fetch_static_map_as_base64(img_url: str) -> str | None:
         return None
 
 
+# Marker labels in pin order; pins past the 35th are labelled 'X'.
+_MAP_MARKER_LABELS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# urllib.parse.quote('color:red|label:', safe='') — pre-encoded once. Labels
+# are alphanumeric and float coordinates only contain [0-9.-], so the rest of
+# each marker needs only the '|' (%7C) and ',' (%2C) separators encoded.
+_MAP_MARKER_PREFIX = 'color%3Ared%7Clabel%3A'
+
+
 def _build_static_map_url(day_items: list):
     """
     Build (img_url, maps_link, location_list_html) for one day's items.
@@ -617,17 +863,19 @@ def _build_static_map_url(day_items: list):
     if not pinned:
         return None
 
-    labels       = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-    marker_parts = []
-    for idx, (lat, lng, _) in enumerate(pinned):
-        label = labels[idx] if idx < len(labels) else 'X'
-        marker_parts.append(f'color:red|label:{label}|{lat},{lng}')
+    marker_params = [
+        f'markers={_MAP_MARKER_PREFIX}'
+        f'{_MAP_MARKER_LABELS[idx] if idx < len(_MAP_MARKER_LABELS) else "X"}'
+        f'%7C{lat}%2C{lng}'
+        for idx, (lat, lng, _) in enumerate(pinned)
+    ]
 
     zoom       = 15 if len(pinned) == 1 else (14 if len(pinned) <= 3 else 13)
     params_str = urllib.parse.urlencode({'size': '900x380', 'scale': '2', 'zoom': zoom, 'key': GOOGLE_PLACES_API_KEY})
-    for mp in marker_parts:
-        params_str += '&markers=' + urllib.parse.quote(mp, safe='')
-    img_url = f'https://maps.googleapis.com/maps/api/staticmap?{params_str}'
+    img_url    = (
+        'https://maps.googleapis.com/maps/api/staticmap?'
+        + params_str + '&' + '&'.join(marker_params)
+    )
 
     all_coords = '|'.join(f'{lat},{lng}' for lat, lng, _ in pinned)
     maps_link  = escape(
@@ -694,6 +942,36 @@ def google_earth_url(lat: float, lng: float, altitude: int = 0) -> str:
     return f'https://earth.google.com/web/@{lat},{lng},{altitude}a,150d,60t,0h,0r'
 
 
+# ---------------------------------------------------------------------------
+# Scout response helpers
+# ---------------------------------------------------------------------------
+
+def _tool_input(message, tool: dict) -> dict:
+    """Return the input of the first tool_use block named after `tool`, or {}."""
+    for block in message.content:
+        if block.type == 'tool_use' and block.name == tool['name']:
+            return block.input
+    return {}
+
+
+def _attach_earth_urls(locations: list) -> None:
+    """Add google_earth_url and mirror lat/lng into _lat/_lng (in place).
+
+    _lat/_lng are what Places verification, haversine distances and map
+    pins read downstream.
+    """
+    for loc in locations:
+        lat = loc.get('lat')
+        lng = loc.get('lng')
+        if lat is not None and lng is not None:
+            try:
+                loc['google_earth_url'] = google_earth_url(float(lat), float(lng))
+                loc['_lat'] = float(lat)
+                loc['_lng'] = float(lng)
+            except (TypeError, ValueError):
+                pass
+
+
 # ---------------------------------------------------------------------------
 # Scout functions (async)
 # ---------------------------------------------------------------------------
@@ -710,21 +988,26 @@ async def call_photo_scout(
     gear_profile:    dict | None = None,
     ephemeris_data:  list | None = None,
     start_date:      date | None = None,
+    profile_hash:    str | None = None,
 ) -> tuple[str, list]:
     """Call Claude to generate Kelby-style photography location guides.
 
     Returns (cache_key, locations_list).
     Gear profile and ephemeris data are injected into the prompts when available.
     google_earth_url is constructed server-side from lat/lng after the call.
+    profile_hash may be passed in when the caller has already digested the
+    client profile; otherwise it is computed here.
     """
     if per_day is None:
         per_day = PHOTOS_PER_DAY
+    if profile_hash is None:
+        profile_hash = _profile_hash(client_profile)
 
     key = _cache_key(
         'photo_v2', location, duration, interests, distance, per_day,
         accommodation, pre_planned,
-        json.dumps(client_profile or {}, sort_keys=True),
-        json.dumps(gear_profile    or {}, sort_keys=True),
+        profile_hash,
+        _profile_hash(gear_profile),
         str(start_date),
     )
     cached = _get_cached(key)
@@ -735,32 +1018,8 @@ async def call_photo_scout(
     count = duration * per_day
 
     # ── Build prompt blocks ────────────────────────────────────────────────
-    accommodation_block = (
-        f'- Starting point: {accommodation}\n'
-        f'  Calculate all distances and travel times from this starting point.\n'
-        if accommodation else
-        '- Starting point: not specified — use city centre as the assumed travel base.\n'
-    )
-    pre_planned_block = (
-        f'Already planned / committed:\n  {pre_planned}\n'
-        f'  Do NOT suggest anything that duplicates or conflicts with the above.\n'
-        if pre_planned else ''
-    )
-
-    profile       = client_profile or {}
-    profile_lines = []
-    if profile.get('travel_style'):
-        profile_lines.append(f"  Travel style: {profile['travel_style']}")
-    if profile.get('home_city'):
-        profile_lines.append(
-            f"  Home city: {profile['home_city']} — avoid locations similar to home; surprise them."
-        )
-    if profile.get('notes'):
-        profile_lines.append(f"  Consultant notes: {profile['notes']}")
-    client_block = (
-        'Client profile:\n' + '\n'.join(profile_lines) + '\n'
-        if profile_lines else
-        'Client profile: none provided — give broadly appealing recommendations.\n'
+    accommodation_block, pre_planned_block, client_block = build_trip_context_blocks(
+        accommodation, pre_planned, client_profile,
     )
 
     ephemeris_block = format_ephemeris_block(ephemeris_data or [])
@@ -782,30 +1041,17 @@ async def call_photo_scout(
     message = await anthropic_client.messages.create(
         model=SCOUT_MODEL,
         max_tokens=8000,
+        service_tier=SCOUT_SERVICE_TIER,
         tools=[PHOTO_TOOL],
         tool_choice={'type': 'any'},
-        system=system_prompt,
+        system=_cached_system(system_prompt),
         messages=[{'role': 'user', 'content': user_prompt}],
     )
 
-    locations = []
-    for block in message.content:
-        if block.type == 'tool_use' and block.name == PHOTO_TOOL['name']:
-            locations = block.input.get('locations', [])
-            break
+    locations = _tool_input(message, PHOTO_TOOL).get('locations', [])
 
     # ── Attach Google Earth URLs server-side ───────────────────────────────
-    for loc in locations:
-        lat = loc.get('lat')
-        lng = loc.get('lng')
-        if lat is not None and lng is not None:
-            try:
-                loc['google_earth_url'] = google_earth_url(float(lat), float(lng))
-                # Mirror into _lat/_lng for Places verification / haversine compatibility
-                loc['_lat'] = float(lat)
-                loc['_lng'] = float(lng)
-            except (TypeError, ValueError):
-                pass
+    _attach_earth_urls(locations)
 
     logger.info(
         'Photo Scout: parsed %d/%d locations for %s (gear=%s ephemeris=%s)',
@@ -830,6 +1076,7 @@ async def call_location_scout_day(
     pre_planned_block:   str,
     client_block:        str,
     start_date:          date | None = None,
+    exclude_names:       list[str] | None = None,
 ) -> list:
     """Phase 1 — Discover photography locations for a single trip day.
 
@@ -839,7 +1086,27 @@ async def call_location_scout_day(
 
     No shot details — those are added in Phase 2 by call_shot_planner.
     Called in parallel for all trip days via asyncio.gather().
+    Top-up calls pass exclude_names (already found for the day) with per_day
+    set to the missing count; max_tokens shrinks with the smaller request.
+
+    Raw (pre-verification) output is cached per day under its own key, which
+    covers only the Phase 1 prompt inputs. A regeneration that changes just
+    the gear profile, or misses the combined photo_v3 cache for any other
+    Phase 2 reason, reuses the discovery tokens and only re-runs verification
+    and shot planning.
     """
+    start_iso = start_date.isoformat() if start_date else None
+    day_key   = _cache_key(
+        'loc_day_v1', day, location, per_day, interests, distance,
+        accommodation_block, pre_planned_block, client_block, start_iso,
+        exclude_names or [],
+    )
+    cached = _get_cached(day_key)
+    if cached is not None:
+        logger.info('Phase 1 Day %d: cache hit for %s', day, location)
+        # Copies — verification and the Phase 2 fallback mutate stubs in place
+        return [dict(loc) for loc in cached]
+
     system_prompt = build_location_scout_system_prompt()
     user_prompt   = build_location_scout_user_prompt(
         day                 = day,
@@ -850,38 +1117,29 @@ async def call_location_scout_day(
         accommodation_block = accommodation_block,
         pre_planned_block   = pre_planned_block,
         client_block        = client_block,
-        start_date          = start_date.isoformat() if start_date else None,
+        start_date          = start_iso,
+        exclude_names       = exclude_names,
     )
 
     message = await asyncio.wait_for(
         anthropic_client.messages.create(
-            model       = SCOUT_MODEL,
-            max_tokens  = 1000,
-            tools       = [LOCATION_TOOL],
-            tool_choice = {'type': 'any'},
-            system      = system_prompt,
-            messages    = [{'role': 'user', 'content': user_prompt}],
+            model        = SCOUT_MODEL,
+            max_tokens   = min(1000, 200 + 200 * per_day) if exclude_names else 1000,
+            service_tier = SCOUT_SERVICE_TIER,
+            tools        = [LOCATION_TOOL],
+            tool_choice  = {'type': 'any'},
+            system       = _cached_system(system_prompt),
+            messages     = [{'role': 'user', 'content': user_prompt}],
         ),
         timeout = CLAUDE_CALL_TIMEOUT,
     )
 
-    locations = []
-    for block in message.content:
-        if block.type == 'tool_use' and block.name == LOCATION_TOOL['name']:
-            locations = block.input.get('locations', [])
-            break
+    locations = _tool_input(message, LOCATION_TOOL).get('locations', [])
 
     # Attach Google Earth URLs and mirror lat/lng for downstream code
-    for loc in locations:
-        lat = loc.get('lat')
-        lng = loc.get('lng')
-        if lat is not None and lng is not None:
-            try:
-                loc['google_earth_url'] = google_earth_url(float(lat), float(lng))
-                loc['_lat'] = float(lat)
-                loc['_lng'] = float(lng)
-            except (TypeError, ValueError):
-                pass
+    _attach_earth_urls(locations)
+    if locations:
+        _set_cached(day_key, [dict(loc) for loc in locations])
 
     logger.info('Phase 1 Day %d: %d location(s) for %s', day, len(locations), location)
     return locations
@@ -892,6 +1150,7 @@ async def call_shot_planner(
     interests:     str,
     gear_profile:  dict | None = None,
     ephemeris_day: dict | None = None,
+    model:         str = SHOT_MODEL,
 ) -> dict:
     """Phase 2 — Generate a Kelby-style shot plan for a single confirmed location.
 
@@ -899,6 +1158,7 @@ async def call_shot_planner(
     into the location_stub dict and returns the merged result.
     location_stub fields win on key collision (geography is authoritative).
     Called in parallel for all locations via asyncio.gather().
+    model defaults to SHOT_MODEL; simple jobs pass SCOUT_MODEL instead.
     """
     eph_block = format_ephemeris_block([ephemeris_day]) if ephemeris_day else ''
 
@@ -913,21 +1173,18 @@ async def call_shot_planner(
 
     message = await asyncio.wait_for(
         anthropic_client.messages.create(
-            model       = SHOT_MODEL,
-            max_tokens  = 1200,
-            tools       = [SHOT_TOOL],
-            tool_choice = {'type': 'any'},
-            system      = system_prompt,
-            messages    = [{'role': 'user', 'content': user_prompt}],
+            model        = model,
+            max_tokens   = 1200,
+            service_tier = SCOUT_SERVICE_TIER,
+            tools        = [SHOT_TOOL],
+            tool_choice  = {'type': 'any'},
+            system       = _cached_system(system_prompt),
+            messages     = [{'role': 'user', 'content': user_prompt}],
         ),
         timeout = CLAUDE_CALL_TIMEOUT,
     )
 
-    shot_plan: dict = {}
-    for block in message.content:
-        if block.type == 'tool_use' and block.name == SHOT_TOOL['name']:
-            shot_plan = block.input
-            break
+    shot_plan: dict = _tool_input(message, SHOT_TOOL)
 
     # Stub fields take precedence — geography / coordinates are authoritative
     merged = {**shot_plan, **location_stub}
@@ -962,6 +1219,24 @@ async def _run_single_scout(name, fn, args, kwargs, location, accommodation_coor
 # Background scout task (asyncio.create_task — runs concurrently with requests)
 # ---------------------------------------------------------------------------
 
+async def _compute_ephemeris(job_id: str, location: str, start_date: date, duration: int) -> list:
+    """Geocode the destination and compute per-day light data. Returns [] on failure."""
+    try:
+        dest_lat, dest_lng = await _geocode_accommodation(location)
+        if dest_lat is None:
+            logger.info('BG job=%s: ephemeris skipped — could not geocode %r',
+                        job_id[:8], location)
+            return []
+        dates          = [start_date + timedelta(days=i) for i in range(duration)]
+        ephemeris_data = await run_in_threadpool(get_daily_ephemeris, dest_lat, dest_lng, dates)
+        logger.info('BG job=%s: ephemeris computed %d days from (%.4f, %.4f)',
+                    job_id[:8], len(ephemeris_data), dest_lat, dest_lng)
+        return ephemeris_data
+    except Exception as eph_exc:
+        logger.warning('BG job=%s: ephemeris computation failed: %s', job_id[:8], eph_exc)
+        return []
+
+
 async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> None:
     """
     Photography-focused scout pipeline executed as a background asyncio coroutine.
@@ -974,12 +1249,10 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
     receives gear profile and ephemeris data for Kelby-style technical output.
     """
     db_session = None
+    io_tasks: list[asyncio.Task] = []
     try:
         _job_update(job_id, {'status': 'running', 'progress': 5, 'message': 'Starting…'})
 
-        # Own DB session — FastAPI's Depends() doesn't work outside a request
-        db_session = await run_in_threadpool(SessionLocal)
-
         # ── Unpack validated params ───────────────────────────────────────────
         location        = params['location']
         duration        = params['duration']
@@ -1002,6 +1275,29 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
                     job_id[:8], location, duration, photos_per_day,
                     gear_profile_id or 'none')
 
+        # Pure dict lookup on the destination — resolved up front, off the tail
+        colors = get_color_palette(location)
+
+        # ── Start DB-independent I/O before touching the DB ───────────────────
+        # Accommodation geocoding and ephemeris (destination geocode + sun
+        # maths) need neither the profiles nor Phase 1, so they run alongside
+        # both and are awaited only where their results are consumed.
+        accommodation_task = None
+        if accommodation and PLACES_VERIFY_ENABLED:
+            accommodation_task = asyncio.create_task(_geocode_accommodation(accommodation))
+            io_tasks.append(accommodation_task)
+        ephemeris_task = None
+        if start_date and PLACES_VERIFY_ENABLED:
+            ephemeris_task = asyncio.create_task(
+                _compute_ephemeris(job_id, location, start_date, duration)
+            )
+            io_tasks.append(ephemeris_task)
+        elif start_date:
+            logger.info('BG job=%s: ephemeris skipped — Places API key not configured', job_id[:8])
+
+        # Own DB session — FastAPI's Depends() doesn't work outside a request
+        db_session = await run_in_threadpool(SessionLocal)
+
         # ── Load client profile ───────────────────────────────────────────────
         client_profile = None
         if client_id is not None:
@@ -1036,67 +1332,30 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
 
         _job_update(job_id, {'progress': 15, 'message': f'Preparing ephemeris for {location}…'})
 
-        # ── Geocode accommodation ─────────────────────────────────────────────
-        accommodation_coords: tuple = (None, None)
-        if accommodation and PLACES_VERIFY_ENABLED:
-            _job_update(job_id, {'progress': 18, 'message': 'Geocoding accommodation…'})
-            accommodation_coords = await _geocode_accommodation(accommodation)
-
-        # ── Compute ephemeris (requires Places API geocoding of destination) ──
-        ephemeris_data: list = []
-        if start_date and PLACES_VERIFY_ENABLED:
-            try:
-                _job_update(job_id, {'progress': 20, 'message': 'Computing light data…'})
-                dest_lat, dest_lng = await _geocode_accommodation(location)
-                if dest_lat is not None:
-                    dates          = [start_date + timedelta(days=i) for i in range(duration)]
-                    ephemeris_data = await run_in_threadpool(
-                        get_daily_ephemeris, dest_lat, dest_lng, dates
-                    )
-                    logger.info('BG job=%s: ephemeris computed %d days from (%.4f, %.4f)',
-                                job_id[:8], len(ephemeris_data), dest_lat, dest_lng)
-                else:
-                    logger.info('BG job=%s: ephemeris skipped — could not geocode %r',
-                                job_id[:8], location)
-            except Exception as eph_exc:
-                logger.warning('BG job=%s: ephemeris computation failed: %s', job_id[:8], eph_exc)
-        elif start_date:
-            logger.info('BG job=%s: ephemeris skipped — Places API key not configured', job_id[:8])
+        # Digest profiles once — reused for every cache key in this job
+        profile_hash = _profile_hash(client_profile)
+        gear_hash    = _profile_hash(gear_profile)
 
-        # ── Build shared prompt blocks (used by Phase 1 calls) ───────────────
-        accommodation_block = (
-            f'- Starting point: {accommodation}\n'
-            f'  Calculate all distances and travel times from this starting point.\n'
-            if accommodation else
-            '- Starting point: not specified — use city centre as the assumed travel base.\n'
-        )
-        pre_planned_block = (
-            f'Already planned / committed:\n  {pre_planned}\n'
-            f'  Do NOT suggest anything that duplicates or conflicts with the above.\n'
-            if pre_planned else ''
-        )
-        profile       = client_profile or {}
-        profile_lines = []
-        if profile.get('travel_style'):
-            profile_lines.append(f"  Travel style: {profile['travel_style']}")
-        if profile.get('home_city'):
-            profile_lines.append(
-                f"  Home city: {profile['home_city']} — avoid locations similar to home; surprise them."
-            )
-        if profile.get('notes'):
-            profile_lines.append(f"  Consultant notes: {profile['notes']}")
-        client_block = (
-            'Client profile:\n' + '\n'.join(profile_lines) + '\n'
-            if profile_lines else
-            'Client profile: none provided — give broadly appealing recommendations.\n'
+        # ── Build shared prompt blocks once (reused by every Phase 1 call) ───
+        accommodation_block, pre_planned_block, client_block = build_trip_context_blocks(
+            accommodation, pre_planned, client_profile,
         )
 
+        # ── Pick the Phase 2 model (simple jobs stay on the scout model) ─────
+        complexity = duration * photos_per_day + 3 * bool(client_profile)
+        if complexity < SIMPLE_JOB_THRESHOLD:
+            shot_model, shot_model_label = SCOUT_MODEL, SCOUT_MODEL_LABEL
+        else:
+            shot_model, shot_model_label = SHOT_MODEL, SHOT_MODEL_LABEL
+        logger.info('BG job=%s: complexity=%d → Phase 2 model %s',
+                    job_id[:8], complexity, shot_model)
+
         # ── Check cache (photo_v3 — two-phase output) ─────────────────────────
         photo_cache_key = _cache_key(
             'photo_v3', location, duration, photo_interests, distance, photos_per_day,
             accommodation, pre_planned,
-            json.dumps(client_profile or {}, sort_keys=True),
-            json.dumps(gear_profile    or {}, sort_keys=True),
+            profile_hash,
+            gear_hash,
             str(start_date),
         )
         final_locations = _get_cached(photo_cache_key)
@@ -1104,7 +1363,10 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
             logger.info('BG job=%s: photo_v3 cache hit for %s (%d locations)',
                         job_id[:8], location, len(final_locations))
         else:
-            # ── Phase 1: Location Discovery — all days in parallel ────────────
+            # ── Per-day pipeline: discover → verify → plan, all days in parallel ─
+            # Each day moves on to Places verification and shot planning as soon
+            # as its own Phase 1 call returns, rather than waiting at a barrier
+            # for the slowest day. Failed / empty days retry independently.
             _job_update(job_id, {'progress': 25,
                                  'message': f'Discovering locations in {location}…'})
             if PLACES_VERIFY_ENABLED:
@@ -1112,50 +1374,16 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
             else:
                 logger.info('BG job=%s: Places verification disabled (no API key)', job_id[:8])
 
-            day_results = await asyncio.gather(
-                *[
-                    call_location_scout_day(
-                        day                 = d,
-                        location            = location,
-                        per_day             = photos_per_day,
-                        interests           = photo_interests,
-                        distance            = distance,
-                        accommodation_block = accommodation_block,
-                        pre_planned_block   = pre_planned_block,
-                        client_block        = client_block,
-                        start_date          = start_date,
-                    )
-                    for d in range(1, duration + 1)
-                ],
-                return_exceptions=True,
-            )
-
-            # Collect successful days; queue failed/empty days for retry
-            location_stubs_by_day: dict[int, list] = {}
-            retry_days: list[int] = []
-            for day_idx, result in enumerate(day_results, 1):
-                if isinstance(result, Exception):
-                    logger.error('BG job=%s: Phase 1 Day %d error — %s',
-                                 job_id[:8], day_idx, result)
-                    retry_days.append(day_idx)
-                elif not result:
-                    logger.warning('BG job=%s: Phase 1 Day %d returned 0 locations',
-                                   job_id[:8], day_idx)
-                    retry_days.append(day_idx)
-                else:
-                    location_stubs_by_day[day_idx] = result
-
-            # Retry failing days (granular — not full-trip retry)
-            for attempt in range(1, SCOUT_MAX_RETRIES + 1):
-                if not retry_days:
-                    break
-                logger.warning('BG job=%s: Phase 1 retry %d for days %s',
-                               job_id[:8], attempt, retry_days)
-                _job_update(job_id, {'message': f'Retrying location discovery for {len(retry_days)} day(s)…'})
-                await asyncio.sleep(SCOUT_RETRY_DELAY)
-                retry_results = await asyncio.gather(
-                    *[
-                        call_location_scout_day(
+            async def _discover_day(d: int) -> list:
+                """Phase 1 for one day, retrying errors and empty results."""
+                for attempt in range(SCOUT_MAX_RETRIES + 1):
+                    if attempt:
+                        logger.warning('BG job=%s: Phase 1 retry %d for day %d',
+                                       job_id[:8], attempt, d)
+                        _job_update(job_id, {'message': f'Retrying location discovery for day {d}…'})
+                        await asyncio.sleep(SCOUT_RETRY_DELAY)
+                    try:
+                        stubs = await call_location_scout_day(
                             day                 = d,
                             location            = location,
                             per_day             = photos_per_day,
@@ -1166,74 +1394,57 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
                             client_block        = client_block,
                             start_date          = start_date,
                         )
-                        for d in retry_days
-                    ],
-                    return_exceptions=True,
-                )
-                still_failing: list[int] = []
-                for d, result in zip(retry_days, retry_results):
-                    if isinstance(result, Exception) or not result:
-                        still_failing.append(d)
-                    else:
-                        location_stubs_by_day[d] = result
-                retry_days = still_failing
-
-            if not location_stubs_by_day:
-                raise ValueError('No photo locations could be generated. Please try again.')
-
-            # Flatten stubs in day order
-            all_stubs = [
-                loc
-                for d in sorted(location_stubs_by_day)
-                for loc in location_stubs_by_day[d]
-            ]
-            logger.info('BG job=%s: Phase 1 complete — %d location stubs across %d day(s)',
-                        job_id[:8], len(all_stubs), len(location_stubs_by_day))
-
-            # ── Places verification (between phases) ──────────────────────────
-            _job_update(job_id, {'progress': 40,
-                                 'message': f'Verifying {len(all_stubs)} location(s)…'})
-            if all_stubs and PLACES_VERIFY_ENABLED:
-                all_stubs, _removed = await verify_places_batch(
-                    all_stubs, 'name', 'address', location
-                )
-                logger.info('BG job=%s: Places verification done (%d remaining)',
-                            job_id[:8], len(all_stubs))
-            if all_stubs and accommodation_coords and accommodation_coords[0] is not None:
-                _apply_distances(all_stubs, accommodation_coords[0], accommodation_coords[1])
-
-            if not all_stubs:
-                raise ValueError('All discovered locations failed verification. Please try again.')
-
-            # ── Phase 2: Shot Planning — all locations in parallel ────────────
-            _job_update(job_id, {'progress': 55,
-                                 'message': f'Planning shots for {len(all_stubs)} location(s)…'})
-
-            # Build per-day ephemeris lookup (0-indexed → 1-based day number)
-            ephemeris_by_day: dict[int, dict | None] = {
-                d: (ephemeris_data[d - 1] if d - 1 < len(ephemeris_data) else None)
-                for d in range(1, duration + 1)
-            }
+                    except Exception as exc:
+                        logger.error('BG job=%s: Phase 1 Day %d error — %s', job_id[:8], d, exc)
+                        continue
+                    if stubs:
+                        missing = photos_per_day - len(stubs)
+                        if missing > 0:
+                            stubs += await _top_up_day(d, stubs, missing)
+                        return stubs
+                    logger.warning('BG job=%s: Phase 1 Day %d returned 0 locations', job_id[:8], d)
+                return []
 
-            shot_results = await asyncio.gather(
-                *[
-                    call_shot_planner(
+            async def _top_up_day(d: int, stubs: list, missing: int) -> list:
+                """One follow-up Phase 1 call asking only for the day's shortfall."""
+                have = [s.get('name', '') for s in stubs]
+                logger.info('BG job=%s: Phase 1 Day %d short by %d — topping up',
+                            job_id[:8], d, missing)
+                try:
+                    extra = await call_location_scout_day(
+                        day                 = d,
+                        location            = location,
+                        per_day             = missing,
+                        interests           = photo_interests,
+                        distance            = distance,
+                        accommodation_block = accommodation_block,
+                        pre_planned_block   = pre_planned_block,
+                        client_block        = client_block,
+                        start_date          = start_date,
+                        exclude_names       = have,
+                    )
+                except Exception as exc:
+                    logger.warning('BG job=%s: Phase 1 Day %d top-up failed — %s', job_id[:8], d, exc)
+                    return []
+                seen = {n.lower() for n in have}
+                return [s for s in extra if s.get('name', '').lower() not in seen][:missing]
+
+            async def _plan_shots(stub: dict) -> dict:
+                """Phase 2 for one location; falls back to a shot-less stub on failure."""
+                ephemeris_data: list = await ephemeris_task if ephemeris_task else []
+                try:
+                    d = stub['day']
+                    return await call_shot_planner(
                         location_stub = stub,
                         interests     = photo_interests,
                         gear_profile  = gear_profile,
-                        ephemeris_day = ephemeris_by_day.get(stub['day']),
+                        ephemeris_day = ephemeris_data[d - 1] if 0 < d <= len(ephemeris_data) else None,
+                        model         = shot_model,
                     )
-                    for stub in all_stubs
-                ],
-                return_exceptions=True,
-            )
-
-            final_locations = []
-            for stub, result in zip(all_stubs, shot_results):
-                if isinstance(result, Exception):
+                except Exception as exc:
                     logger.error(
-                        'BG job=%s: Phase 2 failed for %r Day %d — %s',
-                        job_id[:8], stub.get('name'), stub.get('day'), result,
+                        'BG job=%s: Phase 2 failed for %r Day %s — %s',
+                        job_id[:8], stub.get('name'), stub.get('day'), exc,
                     )
                     # Partial fallback: include the location but mark shots unavailable
                     stub.setdefault('shoot_window', 'See trip notes for timing')
@@ -1241,15 +1452,45 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
                     stub.setdefault('the_reality_check',
                                    'Shot planning could not be completed — please use the Replace button.')
                     stub.setdefault('required_gear', [])
-                    final_locations.append(stub)
-                else:
-                    final_locations.append(result)
+                    return stub
+
+            days_done = 0
+
+            async def _run_day(d: int) -> tuple[int, int, list]:
+                """Full pipeline for one day → (discovered, verified, planned locations)."""
+                nonlocal days_done
+                stubs      = await _discover_day(d)
+                discovered = len(stubs)
+                if stubs and PLACES_VERIFY_ENABLED:
+                    stubs, _removed = await verify_places_batch(stubs, 'name', 'address', location)
+                if stubs and accommodation_task:
+                    acc_lat, acc_lng = await accommodation_task
+                    if acc_lat is not None:
+                        _apply_distances(stubs, acc_lat, acc_lng)
+                planned = await asyncio.gather(*[_plan_shots(stub) for stub in stubs])
+
+                days_done += 1
+                _job_update(job_id, {
+                    'progress': 25 + 55 * days_done // duration,
+                    'message':  f'Planned shots for {days_done} of {duration} day(s)…',
+                })
+                return discovered, len(stubs), list(planned)
+
+            day_results = await asyncio.gather(*[_run_day(d) for d in range(1, duration + 1)])
+
+            if not sum(discovered for discovered, _, _ in day_results):
+                raise ValueError('No photo locations could be generated. Please try again.')
+            if not sum(verified for _, verified, _ in day_results):
+                raise ValueError('All discovered locations failed verification. Please try again.')
+
+            # Flatten in day order (gather preserves argument order)
+            final_locations = [loc for _, _, planned in day_results for loc in planned]
 
             if not any(loc.get('shots') for loc in final_locations):
                 raise ValueError('Shot planning failed for all locations. Please try again.')
 
             logger.info(
-                'BG job=%s: Phase 2 complete — %d/%d locations have shots',
+                'BG job=%s: pipeline complete — %d/%d locations have shots',
                 job_id[:8],
                 sum(1 for l in final_locations if l.get('shots')),
                 len(final_locations),
@@ -1260,11 +1501,9 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
 
         warnings: list[str] = []
 
-        colors = get_color_palette(location)
         _job_update(job_id, {'progress': 80, 'message': 'Saving trip…'})
 
         # ── Store session ─────────────────────────────────────────────────────
-        _evict_sessions()
         session_id = str(uuid.uuid4())
         _session_set(session_id, {
             'location': location,
@@ -1276,8 +1515,12 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
         # ── Save draft trip to DB ─────────────────────────────────────────────
         trip_id = None
         try:
+            # Serialise on the loop so the worker thread only binds and inserts
+            raw_photos_json = orjson.dumps(final_locations).decode()
+            colors_json     = orjson.dumps(colors).decode()
+
             def _save_trip():
-                trip = Trip(
+                trip_id = db_session.execute(insert(Trip).returning(Trip.id), dict(
                     client_id           = client_id,
                     created_by_id       = user_id,
                     gear_profile_id     = gear_profile_id,
@@ -1295,14 +1538,12 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
                     photos_per_day      = photos_per_day,
                     photo_interests     = photo_interests or None,
                     accommodation       = accommodation,
-                    raw_photos          = json.dumps(final_locations),
-                    colors              = json.dumps(colors),
+                    raw_photos          = raw_photos_json,
+                    colors              = colors_json,
                     session_id          = session_id,
-                )
-                db_session.add(trip)
+                )).scalar_one()
                 db_session.commit()
-                db_session.refresh(trip)
-                return trip.id
+                return trip_id
 
             trip_id = await run_in_threadpool(_save_trip)
             logger.info('BG job=%s: trip draft saved id=%d', job_id[:8], trip_id)
@@ -1324,7 +1565,8 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
                 'photos':       final_locations,
                 'photo_count':  len(final_locations),
                 'warnings':     warnings,
-                'model':        f'{SCOUT_MODEL_LABEL} + {SHOT_MODEL_LABEL}',
+                'model':        (SCOUT_MODEL_LABEL if shot_model == SCOUT_MODEL
+                                 else f'{SCOUT_MODEL_LABEL} + {shot_model_label}'),
             },
         })
         logger.info('BG job=%s: complete — %d photo locations',
@@ -1340,6 +1582,9 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
         })
 
     finally:
+        # Unneeded on a cache hit or after a failure — no-op if already done
+        for task in io_tasks:
+            task.cancel()
         if db_session is not None:
             await run_in_threadpool(db_session.close)
 
@@ -1348,6 +1593,13 @@ async def _run_scouts_background(job_id: str, params: dict, user_id: int) -> Non
 # HTML generation helpers (sync — called via run_in_threadpool)
 # ---------------------------------------------------------------------------
 
+# Single-pass str.translate tables for the Maps URL path segments
+_MAPS_SEARCH_PREFIX = 'https://www.google.com/maps/search/'
+_MAPS_ADDR_TABLE    = str.maketrans({' ': '+', ',': '%2C'})
+_MAPS_NAME_TABLE    = str.maketrans({' ': '+'})
+_MAPS_COORDS_TABLE  = str.maketrans({' ': None})
+
+
 def create_google_maps_link(name, address, coordinates):
     """Return the most precise Google Maps URL available.
 
@@ -1360,26 +1612,38 @@ def create_google_maps_link(name, address, coordinates):
         # Use ?q= to drop a precise pin at the coordinates rather than
         # triggering a /maps/search/ which lets Google pick the nearest
         # named place (often the wrong building).
-        coords_clean = str(coordinates).replace(' ', '')
-        return f"https://www.google.com/maps?q={coords_clean}"
+        return f"https://www.google.com/maps?q={str(coordinates).translate(_MAPS_COORDS_TABLE)}"
     elif address:
-        return f"https://www.google.com/maps/search/{address.replace(' ', '+').replace(',', '%2C')}"
+        return _MAPS_SEARCH_PREFIX + address.translate(_MAPS_ADDR_TABLE)
     else:
-        return f"https://www.google.com/maps/search/{name.replace(' ', '+')}"
+        return _MAPS_SEARCH_PREFIX + name.translate(_MAPS_NAME_TABLE)
+
+
+def _item_day(item):
+    return item.get('day', 1)
+
+
+@lru_cache(maxsize=4096)
+def _escape_cached(text):
+    return escape(text)
 
 
 def _e(value, fallback='N/A'):
-    return escape(str(value)) if value else fallback
+    # Labels like cuisines, hours and shoot windows recur across cards
+    return _escape_cached(str(value)) if value else fallback
+
+
+_BADGE_OPERATIONAL = '<span class="verify-badge verified">✓ Verified Open</span>'
+_BADGE_UNVERIFIED  = '<span class="verify-badge unverified">Unverified — confirm before visiting</span>'
+_BADGE_BY_STATUS   = {STATUS_OPERATIONAL: _BADGE_OPERATIONAL}
+_UNVERIFIED_RESULT = (_BADGE_UNVERIFIED, '', None)
 
 
 def _verification_badge_html(item):
-    status        = item.get('_status')
     confirmed_url = item.get('_maps_url')
-    if status == STATUS_OPERATIONAL:
-        badge = '<span class="verify-badge verified">✓ Verified Open</span>'
-    else:
-        badge = '<span class="verify-badge unverified">Unverified — confirm before visiting</span>'
-    return badge, '', confirmed_url
+    if confirmed_url is None and item.get('_status') != STATUS_OPERATIONAL:
+        return _UNVERIFIED_RESULT   # no Places match or verification disabled — the common case
+    return _BADGE_BY_STATUS.get(item.get('_status'), _BADGE_UNVERIFIED), '', confirmed_url
 
 
 def build_day_map_html(data_uri, maps_link, location_list_html):
@@ -1395,74 +1659,38 @@ def build_day_map_html(data_uri, maps_link, location_list_html):
     return location_list_html
 
 
-def generate_master_html(location, duration, photos, restaurants=None, attractions=None, colors=None, prefetched_maps=None):
-    """Generate unified HTML master document — Editorial theme (Kelby-style photography pivot).
-
-    restaurants and attractions are accepted for backward compatibility with
-    trips generated before the Phase 3 pivot.  New trips will pass empty lists.
-    colors defaults to the palette for the location.
-    """
-    restaurants = restaurants or []
-    attractions  = attractions  or []
-    colors       = colors or get_color_palette(location)
-
-    safe_location  = escape(location)
-    generated_date = datetime.now().strftime('%B %d, %Y')
-    city_name      = escape(location.split(',')[0].strip())
-
-    roman = ['I', 'II', 'III']
-    active_sections = []
-    if photos:      active_sections.append('photos')
-    if restaurants: active_sections.append('restaurants')
-    if attractions: active_sections.append('attractions')
-
-    section_names         = {'photos': 'Photography', 'restaurants': 'Dining', 'attractions': 'Attractions'}
-    cover_footer_sections = ' &middot; '.join(section_names[s] for s in active_sections) or 'Photography Guide'
-    cover_dek_parts = []
-    if photos:       cover_dek_parts.append('photography locations')
-    if restaurants:  cover_dek_parts.append('dining recommendations')
-    if attractions:  cover_dek_parts.append('attractions worth seeking out')
-    cover_dek_text = ', '.join(cover_dek_parts[:-1]) + (
-        f' and {cover_dek_parts[-1]}' if len(cover_dek_parts) > 1
-        else (cover_dek_parts[0] if cover_dek_parts else 'photography locations')
-    )
+# ---------------------------------------------------------------------------
+# Master guide stylesheet — static text built once at import. Only the two
+# palette variables in :root are rendered per document, between HEAD and TAIL.
+# ---------------------------------------------------------------------------
 
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{safe_location} Travel Guide &mdash; {duration} Days</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:ital,wght@0,400;0,700;1,400;1,700&family=Inter:wght@300;400;500;600&display=swap" rel="stylesheet">
-    <style>
-        *, *::before, *::after {{
+_MASTER_CSS_HEAD = """        *, *::before, *::after {
             margin: 0; padding: 0; box-sizing: border-box;
-        }}
+        }
 
-        :root {{
+        :root {
             --bg:      #f5f2ee;
             --white:   #ffffff;
             --ink:     #1a1a1a;
             --ink-2:   #4a4a4a;
             --rule:    #d8d3cc;
             --sand:    #e8e2d9;
-            --primary: {colors['primary']};
-            --accent:  {colors['accent']};
-        }}
+"""
+
+_MASTER_CSS_TAIL = """        }
 
-        html {{ scroll-behavior: smooth; }}
+        html { scroll-behavior: smooth; }
 
-        body {{
+        body {
             font-family: 'Inter', sans-serif;
             background: var(--bg);
             color: var(--ink);
             font-weight: 300;
             line-height: 1.6;
-        }}
+        }
 
         /* ── PRINT BUTTON (screen only) ── */
-        .print-btn {{
+        .print-btn {
             position: fixed;
             top: 24px; right: 24px;
             padding: 10px 22px;
@@ -1477,132 +1705,132 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             cursor: pointer;
             z-index: 999;
             transition: background 0.2s;
-        }}
-        .print-btn:hover {{ background: var(--primary); }}
+        }
+        .print-btn:hover { background: var(--primary); }
 
         /* ── COVER ── */
-        .cover {{
+        .cover {
             min-height: 100vh;
             display: grid;
             grid-template-rows: auto 1fr auto;
             background: var(--white);
             border-bottom: 3px solid var(--ink);
-        }}
+        }
 
-        .cover-masthead {{
+        .cover-masthead {
             padding: 28px 56px;
             border-bottom: 1px solid var(--rule);
             display: flex;
             align-items: center;
             justify-content: space-between;
-        }}
+        }
 
-        .cover-masthead-brand {{
+        .cover-masthead-brand {
             font-family: 'Playfair Display', serif;
             font-size: 1.2rem;
             font-weight: 700;
             letter-spacing: -0.01em;
-        }}
+        }
 
-        .cover-masthead-meta {{
+        .cover-masthead-meta {
             font-size: 0.65rem;
             letter-spacing: 0.18em;
             text-transform: uppercase;
             color: var(--ink-2);
-        }}
+        }
 
-        .cover-body {{
+        .cover-body {
             display: grid;
             grid-template-columns: 1fr 1fr;
             min-height: 70vh;
-        }}
+        }
 
-        .cover-text {{
+        .cover-text {
             padding: 72px 56px;
             display: flex;
             flex-direction: column;
             justify-content: center;
             border-right: 1px solid var(--rule);
-        }}
+        }
 
-        .cover-kicker {{
+        .cover-kicker {
             font-size: 0.65rem;
             letter-spacing: 0.22em;
             text-transform: uppercase;
             color: var(--primary);
             font-weight: 600;
             margin-bottom: 24px;
-        }}
+        }
 
-        .cover-headline {{
+        .cover-headline {
             font-family: 'Playfair Display', serif;
             font-size: clamp(3rem, 6vw, 5.5rem);
             font-weight: 700;
             line-height: 0.95;
             letter-spacing: -0.03em;
             margin-bottom: 28px;
-        }}
+        }
 
-        .cover-headline em {{
+        .cover-headline em {
             font-style: italic;
             color: var(--primary);
-        }}
+        }
 
-        .cover-dek {{
+        .cover-dek {
             font-size: 0.95rem;
             line-height: 1.75;
             color: var(--ink-2);
             max-width: 360px;
             margin-bottom: 40px;
-        }}
+        }
 
-        .cover-stats {{
+        .cover-stats {
             display: flex;
             gap: 32px;
             padding-top: 32px;
             border-top: 1px solid var(--rule);
-        }}
+        }
 
-        .cover-stat-num {{
+        .cover-stat-num {
             font-family: 'Playfair Display', serif;
             font-size: 2rem;
             font-weight: 700;
             line-height: 1;
             color: var(--primary);
-        }}
+        }
 
-        .cover-stat-label {{
+        .cover-stat-label {
             font-size: 0.65rem;
             letter-spacing: 0.12em;
             text-transform: uppercase;
             color: var(--ink-2);
             margin-top: 4px;
-        }}
+        }
 
-        .cover-visual {{
+        .cover-visual {
             background: var(--sand);
             display: flex;
             align-items: center;
             justify-content: center;
             position: relative;
             overflow: hidden;
-        }}
+        }
 
-        .cover-visual svg {{
+        .cover-visual svg {
             width: 55%;
             opacity: 0.18;
-        }}
+        }
 
-        .cover-visual-label {{
+        .cover-visual-label {
             position: absolute;
             bottom: 28px; right: 28px;
             font-size: 0.6rem;
             letter-spacing: 0.18em;
             text-transform: uppercase;
             color: var(--ink-2);
-        }}
+        }
 
-        .cover-footer {{
+        .cover-footer {
             padding: 20px 56px;
             border-top: 1px solid var(--rule);
             display: flex;
@@ -1612,89 +1840,89 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             letter-spacing: 0.1em;
             text-transform: uppercase;
             color: var(--ink-2);
-        }}
+        }
 
-        .cover-footer-accent {{
+        .cover-footer-accent {
             color: var(--primary);
             font-weight: 600;
-        }}
+        }
 
         /* ── SECTIONS ── */
-        .section {{
+        .section {
             max-width: 960px;
             margin: 0 auto;
             padding: 72px 56px;
-        }}
+        }
 
-        .section + .section {{
+        .section + .section {
             border-top: 1px solid var(--rule);
-        }}
+        }
 
-        .section-header {{
+        .section-header {
             display: flex;
             align-items: baseline;
             gap: 20px;
             margin-bottom: 48px;
             padding-bottom: 20px;
             border-bottom: 3px solid var(--ink);
-        }}
+        }
 
-        .section-number {{
+        .section-number {
             font-family: 'Playfair Display', serif;
             font-size: 3rem;
             font-weight: 700;
             color: var(--rule);
             line-height: 1;
-        }}
+        }
 
-        .section-title {{
+        .section-title {
             font-family: 'Playfair Display', serif;
             font-size: 1.8rem;
             font-weight: 700;
             line-height: 1.1;
             letter-spacing: -0.02em;
-        }}
+        }
 
-        .section-subtitle {{
+        .section-subtitle {
             font-size: 0.72rem;
             letter-spacing: 0.15em;
             text-transform: uppercase;
             color: var(--ink-2);
             margin-top: 6px;
-        }}
+        }
 
         /* ── DAY DIVIDERS ── */
-        .day-divider {{
+        .day-divider {
             display: flex;
             align-items: center;
             gap: 20px;
             margin: 40px 0 24px;
-        }}
+        }
 
-        .day-divider-label {{
+        .day-divider-label {
             font-size: 0.65rem;
             font-weight: 600;
             letter-spacing: 0.22em;
             text-transform: uppercase;
             color: var(--primary);
             white-space: nowrap;
-        }}
+        }
 
-        .day-divider-rule {{
+        .day-divider-rule {
             flex: 1;
             height: 1px;
             background: var(--rule);
-        }}
+        }
 
         /* ── ITEM CARDS ── */
-        .item-card {{
+        .item-card {
             background: var(--white);
             border-left: 3px solid var(--primary);
             padding: 28px 32px;
             margin-bottom: 16px;
-        }}
+        }
 
-        .item-card-head {{
+        .item-card-head {
             display: flex;
             align-items: flex-start;
             justify-content: space-between;
@@ -1702,17 +1930,17 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             margin-bottom: 20px;
             padding-bottom: 16px;
             border-bottom: 1px solid var(--rule);
-        }}
+        }
 
-        .item-card-title {{
+        .item-card-title {
             font-family: 'Playfair Display', serif;
             font-size: 1.25rem;
             font-weight: 700;
             letter-spacing: -0.01em;
             line-height: 1.2;
-        }}
+        }
 
-        .item-card-tag {{
+        .item-card-tag {
             display: inline-block;
             padding: 4px 12px;
             background: var(--sand);
@@ -1723,101 +1951,101 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             color: var(--ink-2);
             white-space: nowrap;
             flex-shrink: 0;
-        }}
+        }
 
-        .item-card-tag.highlight {{
+        .item-card-tag.highlight {
             background: var(--primary);
             color: var(--white);
-        }}
+        }
 
-        .item-card-tag.price-tag {{
+        .item-card-tag.price-tag {
             font-family: 'Playfair Display', serif;
             font-size: 0.78rem;
             font-weight: 700;
             letter-spacing: 0.04em;
             color: var(--ink);
             background: var(--sand);
-        }}
+        }
 
-        .item-meta-grid {{
+        .item-meta-grid {
             display: grid;
             grid-template-columns: 1fr 1fr;
             gap: 20px;
             margin-bottom: 20px;
             font-size: 0.875rem;
-        }}
+        }
 
-        .meta-cell {{
+        .meta-cell {
             display: flex;
             flex-direction: column;
             gap: 4px;
-        }}
+        }
 
-        .meta-label {{
+        .meta-label {
             font-size: 0.62rem;
             font-weight: 600;
             letter-spacing: 0.16em;
             text-transform: uppercase;
             color: var(--ink-2);
-        }}
+        }
 
-        .meta-value {{
+        .meta-value {
             color: var(--ink);
             line-height: 1.55;
-        }}
+        }
 
-        .item-card-body {{
+        .item-card-body {
             display: flex;
             flex-direction: column;
             gap: 16px;
-        }}
+        }
 
-        .full-field {{
+        .full-field {
             font-size: 0.875rem;
             line-height: 1.65;
-        }}
+        }
 
-        .full-field .meta-label {{
+        .full-field .meta-label {
             display: block;
             margin-bottom: 5px;
-        }}
+        }
 
         /* Multi-shot blocks within a photo card */
-        .shot-block {{
+        .shot-block {
             border-top: 1px solid #e8e2d9;
             padding-top: 16px;
             margin-top: 16px;
-        }}
-        .shot-block:first-child {{
+        }
+        .shot-block:first-child {
             border-top: none;
             padding-top: 0;
             margin-top: 0;
-        }}
-        .shot-number {{
+        }
+        .shot-number {
             font-weight: 600;
             font-size: 0.76rem;
             text-transform: uppercase;
             letter-spacing: 0.07em;
             color: var(--primary);
             margin-bottom: 10px;
-        }}
+        }
 
         /* Tip highlight box */
-        .tip-box {{
+        .tip-box {
             background: var(--sand);
             border-left: 3px solid var(--accent);
             padding: 14px 18px;
             font-size: 0.85rem;
             line-height: 1.6;
-        }}
+        }
 
-        .tip-box .meta-label {{
+        .tip-box .meta-label {
             color: var(--primary);
             margin-bottom: 4px;
-        }}
+        }
 
         /* ── VERIFICATION BADGES ── */
-        .verify-badge {{
+        .verify-badge {
             display: inline-flex;
             align-items: center;
             gap: 5px;
@@ -1827,29 +2055,29 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             text-transform: uppercase;
             padding: 3px 10px;
             border-radius: 2px;
-        }}
+        }
 
-        .verify-badge.verified {{
+        .verify-badge.verified {
             background: #eaf7ee;
             color: #1a7a3a;
-        }}
+        }
 
-        .verify-badge.unverified {{
+        .verify-badge.unverified {
             background: var(--sand);
             color: var(--ink-2);
-        }}
+        }
 
         /* ── DAY MAP ── */
-        .day-map {{
+        .day-map {
             margin: 8px 0 28px;
             border: 1px solid var(--rule);
             overflow: hidden;
-        }}
-        .day-map a {{
+        }
+        .day-map a {
             display: block;
             position: relative;
-        }}
-        .day-map a::after {{
+        }
+        .day-map a::after {
             content: "Open in Google Maps ↗";
             position: absolute;
             bottom: 10px;
@@ -1864,9 +2092,9 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             border-radius: 3px;
             box-shadow: 0 1px 4px rgba(0,0,0,0.18);
             pointer-events: none;
-        }}
+        }
 
-        .day-map-label {{
+        .day-map-label {
             font-size: 0.62rem;
             font-weight: 600;
             letter-spacing: 0.16em;
@@ -1878,45 +2106,45 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
+        }
 
-        .day-map-print-list {{
+        .day-map-print-list {
             margin: 0;
             padding: 10px 16px 12px 36px;
             font-size: 0.8rem;
             color: var(--ink-2);
             background: var(--sand);
-        }}
-        .day-map-print-list li {{
+        }
+        .day-map-print-list li {
             margin-bottom: 4px;
-        }}
+        }
 
-        @media print {{
-            .day-map {{
+        @media print {
+            .day-map {
                 margin: 6px 0 20px;
                 break-inside: avoid;
                 page-break-inside: avoid;
                 border: 1px solid #ddd;
-            }}
-            .day-map-link img {{
+            }
+            .day-map-link img {
                 max-height: 260px;
                 width: 100%;
                 object-fit: cover;
                 display: block;
-            }}
-            .day-map a::after {{
+            }
+            .day-map a::after {
                 display: none;
-            }}
-        }}
+            }
+        }
 
         /* Maps link */
-        .maps-link {{
+        .maps-link {
             margin-top: 20px;
             padding-top: 16px;
             border-top: 1px solid var(--rule);
-        }}
+        }
 
-        .maps-link a {{
+        .maps-link a {
             display: inline-flex;
             align-items: center;
             gap: 8px;
@@ -1926,19 +2154,19 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             text-transform: uppercase;
             color: var(--primary);
             text-decoration: none;
-        }}
+        }
 
-        .maps-link a::after {{
+        .maps-link a::after {
             content: '→';
             font-size: 1em;
-        }}
+        }
 
-        .maps-link a:hover {{
+        .maps-link a:hover {
             text-decoration: underline;
-        }}
+        }
 
         /* ── FOOTER ── */
-        .doc-footer {{
+        .doc-footer {
             background: var(--ink);
             color: rgba(255,255,255,0.5);
             padding: 40px 56px;
@@ -1948,101 +2176,366 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
             font-size: 0.7rem;
             letter-spacing: 0.1em;
             text-transform: uppercase;
-        }}
+        }
 
-        .doc-footer-brand {{
+        .doc-footer-brand {
             font-family: 'Playfair Display', serif;
             font-size: 1rem;
             font-weight: 700;
             color: var(--white);
             letter-spacing: -0.01em;
             text-transform: none;
-        }}
+        }
 
-        .doc-footer-right {{
+        .doc-footer-right {
             text-align: right;
-        }}
+        }
 
         /* ── PRINT ── */
-        @media print {{
-            .print-btn {{ display: none; }}
-            body {{ background: white; }}
-            .cover {{ min-height: auto; page-break-after: always; }}
-            .section {{ page-break-inside: avoid; }}
-            .item-card {{ page-break-inside: avoid; }}
-        }}
-
-        @media (max-width: 720px) {{
-            .cover-body {{ grid-template-columns: 1fr; }}
-            .cover-visual {{ display: none; }}
-            .cover-text, .section, .cover-masthead, .cover-footer, .doc-footer {{
+        @media print {
+            .print-btn { display: none; }
+            body { background: white; }
+            .cover { min-height: auto; page-break-after: always; }
+            .section { page-break-inside: avoid; }
+            .item-card { page-break-inside: avoid; }
+        }
+
+        @media (max-width: 720px) {
+            .cover-body { grid-template-columns: 1fr; }
+            .cover-visual { display: none; }
+            .cover-text, .section, .cover-masthead, .cover-footer, .doc-footer {
                 padding-left: 24px; padding-right: 24px;
-            }}
-            .item-meta-grid {{ grid-template-columns: 1fr; }}
-        }}
-    </style>
+            }
+            .item-meta-grid { grid-template-columns: 1fr; }
+        }
+"""
+
+
+# Cover copy keyed by active-section bitmask: photos=1, restaurants=2, attractions=4.
+_COVER_DEK = {
+    0b000: 'photography locations',
+    0b001: 'photography locations',
+    0b010: 'dining recommendations',
+    0b011: 'photography locations and dining recommendations',
+    0b100: 'attractions worth seeking out',
+    0b101: 'photography locations and attractions worth seeking out',
+    0b110: 'dining recommendations and attractions worth seeking out',
+    0b111: 'photography locations, dining recommendations and attractions worth seeking out',
+}
+_COVER_FOOTER = {
+    0b000: 'Photography Guide',
+    0b001: 'Photography',
+    0b010: 'Dining',
+    0b011: 'Photography &middot; Dining',
+    0b100: 'Attractions',
+    0b101: 'Photography &middot; Attractions',
+    0b110: 'Dining &middot; Attractions',
+    0b111: 'Photography &middot; Dining &middot; Attractions',
+}
+
+
+# Static document scaffolding around the stylesheet, cover and footer.
+_DOC_HEAD_TMPL = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>%(location)s Travel Guide &mdash; %(duration)s Days</title>
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:ital,wght@0,400;0,700;1,400;1,700&family=Inter:wght@300;400;500;600&display=swap" rel="stylesheet">
+    <style>
+"""
+
+_PALETTE_TMPL = """            --primary: %(primary)s;
+            --accent:  %(accent)s;
+"""
+
+_DOC_HEAD_SUFFIX = """    </style>
 </head>
 <body>
 
     <button class="print-btn" onclick="window.print()">Save as PDF</button>
 
-    <!-- ── COVER ── -->
+"""
+
+_COVER_STAT_TMPL = '<div><div class="cover-stat-num">%s</div><div class="cover-stat-label">%s</div></div>'
+
+_COVER_VISUAL_SVG = """                <svg viewBox="0 0 200 200" fill="none" xmlns="http://www.w3.org/2000/svg">
+                    <circle cx="100" cy="100" r="90" stroke="#1a1a1a" stroke-width="1"/>
+                    <circle cx="100" cy="100" r="60" stroke="#1a1a1a" stroke-width="1"/>
+                    <circle cx="100" cy="100" r="30" stroke="#1a1a1a" stroke-width="1"/>
+                    <line x1="100" y1="10" x2="100" y2="190" stroke="#1a1a1a" stroke-width="1"/>
+                    <line x1="10" y1="100" x2="190" y2="100" stroke="#1a1a1a" stroke-width="1"/>
+                    <line x1="36" y1="36" x2="164" y2="164" stroke="#1a1a1a" stroke-width="0.5"/>
+                    <line x1="164" y1="36" x2="36" y2="164" stroke="#1a1a1a" stroke-width="0.5"/>
+                    <polygon points="100,10 106,95 100,100 94,95" fill="#1a1a1a"/>
+                    <polygon points="100,190 94,105 100,100 106,105" fill="#1a1a1a" opacity="0.3"/>
+                </svg>
+"""
+
+_COVER_TMPL = """    <!-- ── COVER ── -->
     <div class="cover">
         <div class="cover-masthead">
             <div class="cover-masthead-brand">Trip Master</div>
-            <div class="cover-masthead-meta">AI Travel Intelligence &middot; {generated_date}</div>
+            <div class="cover-masthead-meta">AI Travel Intelligence &middot; %(date)s</div>
         </div>
 
         <div class="cover-body">
             <div class="cover-text">
                 <p class="cover-kicker">Your Bespoke Travel Guide</p>
-                <h1 class="cover-headline">{city_name}<br><em>awaits.</em></h1>
+                <h1 class="cover-headline">%(city)s<br><em>awaits.</em></h1>
                 <p class="cover-dek">
-                    A curated {duration}-day itinerary crafted for you &mdash;
-                    {cover_dek_text} in {safe_location}.
+                    A curated %(duration)s-day itinerary crafted for you &mdash;
+                    %(dek)s in %(location)s.
                 </p>
                 <div class="cover-stats">
-                    {''.join([
-                        f'<div><div class="cover-stat-num">{len(photos)}</div><div class="cover-stat-label">Photo Spots</div></div>'
-                        if photos else '',
-                        f'<div><div class="cover-stat-num">{len(restaurants)}</div><div class="cover-stat-label">Restaurants</div></div>'
-                        if restaurants else '',
-                        f'<div><div class="cover-stat-num">{len(attractions)}</div><div class="cover-stat-label">Attractions</div></div>'
-                        if attractions else '',
-                        f'<div><div class="cover-stat-num">{duration}</div><div class="cover-stat-label">Days</div></div>',
-                    ])}
+                    %(stats)s
                 </div>
             </div>
             <div class="cover-visual">
-                <svg viewBox="0 0 200 200" fill="none" xmlns="http://www.w3.org/2000/svg">
-                    <circle cx="100" cy="100" r="90" stroke="#1a1a1a" stroke-width="1"/>
-                    <circle cx="100" cy="100" r="60" stroke="#1a1a1a" stroke-width="1"/>
-                    <circle cx="100" cy="100" r="30" stroke="#1a1a1a" stroke-width="1"/>
-                    <line x1="100" y1="10" x2="100" y2="190" stroke="#1a1a1a" stroke-width="1"/>
-                    <line x1="10" y1="100" x2="190" y2="100" stroke="#1a1a1a" stroke-width="1"/>
-                    <line x1="36" y1="36" x2="164" y2="164" stroke="#1a1a1a" stroke-width="0.5"/>
-                    <line x1="164" y1="36" x2="36" y2="164" stroke="#1a1a1a" stroke-width="0.5"/>
-                    <polygon points="100,10 106,95 100,100 94,95" fill="#1a1a1a"/>
-                    <polygon points="100,190 94,105 100,100 106,105" fill="#1a1a1a" opacity="0.3"/>
-                </svg>
-                <span class="cover-visual-label">{safe_location}</span>
+""" + _COVER_VISUAL_SVG + """                <span class="cover-visual-label">%(location)s</span>
             </div>
         </div>
 
         <div class="cover-footer">
-            <span>{cover_footer_sections}</span>
+            <span>%(footer)s</span>
             <span class="cover-footer-accent">Powered by Claude AI</span>
         </div>
     </div>
 
 """
 
-    section_idx = 0
+_DOC_FOOTER_TMPL = """
+
+    <!-- ── FOOTER ── -->
+    <div class="doc-footer">
+        <div>
+            <div class="doc-footer-brand">Trip Master</div>
+            <div style="margin-top:6px;">%(location)s &middot; %(duration)s Days</div>
+        </div>
+        <div class="doc-footer-right">
+            <div>Generated %(date)s</div>
+            <div style="margin-top:4px;">Powered by Claude AI</div>
+        </div>
+    </div>
+
+</body>
+</html>
+"""
+
+# Repeated document fragments, filled with %-formatting from a single mapping.
+_DAY_DIVIDER_TMPL = """
+        <div class="day-divider">
+            <span class="day-divider-label">Day %(day)s</span>
+            <div class="day-divider-rule"></div>
+        </div>"""
+
+_MAP_PIN_SVG = '<svg width="12" height="12" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5"><path d="M21 10c0 7-9 13-9 13s-9-6-9-13a9 9 0 0 1 18 0z"/><circle cx="12" cy="10" r="3"/></svg>'
+
+_DAY_MAP_LABEL_TMPL = """
+            <div class="day-map-label">
+                """ + _MAP_PIN_SVG + """
+                Day %(day)s %(label)s &mdash; %(count_label)s
+            </div>"""
+
+_DAY_MAP_TMPL = """
+        <div class="day-map">""" + _DAY_MAP_LABEL_TMPL + """
+            %(map_img)s
+        </div>"""
+
+_PHOTO_CARD_TMPL = """
+        <div class="item-card">
+            <div class="item-card-head">
+                <h3 class="item-card-title">%(name)s</h3>
+                <div style="display:flex;gap:6px;align-items:center;flex-shrink:0;">
+                    %(badge)s
+                    <span class="item-card-tag highlight">%(shoot_window)s</span>
+                </div>
+            </div>
+            <div class="item-card-body">
+                %(shots_html)s
+                <div class="tip-box">
+                    <span class="meta-label">The Reality Check</span>
+                    %(reality_check)s
+                </div>
+                %(gear_html)s
+                <div class="item-meta-grid">
+                    %(dist_html)s
+                </div>
+                %(notice)s
+                <div class="maps-link" style="display:flex;gap:24px;flex-wrap:wrap;">
+                    <a href="%(maps_url)s" target="_blank" rel="noopener noreferrer">View on Google Maps</a>
+                    %(earth_link_html)s
+                </div>
+            </div>
+        </div>"""
+
+_RESTAURANT_CARD_TMPL = """
+        <div class="item-card">
+            <div class="item-card-head">
+                <h3 class="item-card-title">%(name)s</h3>
+                <div style="display:flex;gap:6px;flex-shrink:0;align-items:center;">
+                    %(badge)s
+                    %(meal_tag)s
+                    %(price_tag)s
+                </div>
+            </div>
+            <div class="item-card-body">
+                <div class="full-field">
+                    <span class="meta-label">About</span>
+                    %(description)s
+                </div>
+                <div class="item-meta-grid">
+                    <div class="meta-cell">
+                        <span class="meta-label">Cuisine</span>
+                        <span class="meta-value">%(cuisine)s</span>
+                    </div>
+                    <div class="meta-cell">
+                        <span class="meta-label">Neighbourhood</span>
+                        <span class="meta-value">%(neighbourhood)s</span>
+                    </div>
+                    <div class="meta-cell">
+                        <span class="meta-label">Hours</span>
+                        <span class="meta-value">%(hours)s</span>
+                    </div>
+                    <div class="meta-cell">
+                        <span class="meta-label">Signature Dish</span>
+                        <span class="meta-value">%(signature_dish)s</span>
+                    </div>
+                    %(travel_html)s
+                </div>
+                %(why_html)s
+                <div class="tip-box">
+                    <span class="meta-label">Insider Tip</span>
+                    %(insider_tip)s
+                </div>
+                %(notice)s
+                <div class="maps-link">
+                    <a href="%(maps_url)s" target="_blank" rel="noopener noreferrer">View on Google Maps</a>
+                </div>
+            </div>
+        </div>"""
+
+_ATTRACTION_CARD_TMPL = """
+        <div class="item-card">
+            <div class="item-card-head">
+                <h3 class="item-card-title">%(name)s</h3>
+                <div style="display:flex;gap:6px;flex-shrink:0;align-items:center;">
+                    %(badge)s
+                    <span class="item-card-tag highlight">%(time)s</span>
+                    <span class="item-card-tag">%(admission)s</span>
+                </div>
+            </div>
+            <div class="item-card-body">
+                <div class="meta-cell">
+                    <span class="meta-label">About</span>
+                    <span class="meta-value">%(description)s</span>
+                </div>
+                <div class="item-meta-grid">
+                    <div class="meta-cell">
+                        <span class="meta-label">Category</span>
+                        <span class="meta-value">%(category)s</span>
+                    </div>
+                    <div class="meta-cell">
+                        <span class="meta-label">Hours</span>
+                        <span class="meta-value">%(hours)s</span>
+                    </div>
+                    <div class="meta-cell">
+                        <span class="meta-label">Time Needed</span>
+                        <span class="meta-value">%(duration)s</span>
+                    </div>
+                    <div class="meta-cell">
+                        <span class="meta-label">Best Time to Visit</span>
+                        <span class="meta-value">%(best_time)s</span>
+                    </div>
+                    %(travel_html)s
+                </div>
+                %(why_html)s
+                <div class="tip-box">
+                    <span class="meta-label">Highlight &amp; Insider Tip</span>
+                    <strong>%(highlight)s</strong> &mdash; %(insider_tip)s
+                </div>
+                %(notice)s
+                <div class="maps-link">
+                    <a href="%(maps_url)s" target="_blank" rel="noopener noreferrer">View on Google Maps</a>
+                </div>
+            </div>
+        </div>"""
+
+# Rendered guides keyed by a digest of every input. Re-finalising an unchanged
+# review (print preview, revise-and-return) reuses the previous document.
+RENDER_CACHE_MAX = int(os.getenv('RENDER_CACHE_MAX', '32'))
+_render_cache    = LRUCache(maxsize=RENDER_CACHE_MAX)
+
+# Rendering runs on its own small pool so a burst of /finalize calls can't
+# starve the shared Starlette threadpool that every DB call goes through.
+HTML_RENDER_WORKERS = int(os.getenv('HTML_RENDER_WORKERS', str(min(4, os.cpu_count() or 1))))
+_html_pool          = ThreadPoolExecutor(max_workers=HTML_RENDER_WORKERS, thread_name_prefix='html-render')
+
+
+def generate_master_html(location, duration, photos, restaurants=None, attractions=None, colors=None, prefetched_maps=None, out=None):
+    """Generate unified HTML master document — Editorial theme (Kelby-style photography pivot).
+
+    restaurants and attractions are accepted for backward compatibility with
+    trips generated before the Phase 3 pivot.  New trips will pass empty lists.
+    colors defaults to the palette for the location.
+
+    The document is written piecewise to out (any object with .write()); when
+    out is omitted the pieces are collected in a list and returned joined.
+    """
+    restaurants = restaurants or []
+    attractions  = attractions  or []
+    colors       = colors or get_color_palette(location)
+    maps         = prefetched_maps or {}
+
+    safe_location  = escape(location)
+    generated_date = datetime.now().strftime('%B %d, %Y')
+    city_name      = escape(location.split(',')[0].strip())
+
+    render_key = None
+    if out is None and RENDER_CACHE_MAX:
+        render_key = _cache_key(location, duration, photos, restaurants, attractions,
+                                colors, sorted(maps.items()), generated_date)
+        with _local_lock:
+            cached = _render_cache.get(render_key)
+        if cached is not None:
+            return cached
+
+    mask = bool(photos) | bool(restaurants) << 1 | bool(attractions) << 2
+    cover_footer_sections = _COVER_FOOTER[mask]
+    cover_dek_text        = _COVER_DEK[mask]
+
+    parts = []
+    write = out.write if out is not None else parts.append
+
+    cover_stats = ''
+    if photos:      cover_stats += _COVER_STAT_TMPL % (len(photos), 'Photo Spots')
+    if restaurants: cover_stats += _COVER_STAT_TMPL % (len(restaurants), 'Restaurants')
+    if attractions: cover_stats += _COVER_STAT_TMPL % (len(attractions), 'Attractions')
+    cover_stats += _COVER_STAT_TMPL % (duration, 'Days')
+
+    write(_DOC_HEAD_TMPL % {'location': safe_location, 'duration': duration})
+    write(_MASTER_CSS_HEAD)
+    write(_PALETTE_TMPL % colors)
+    write(_MASTER_CSS_TAIL)
+    write(_DOC_HEAD_SUFFIX)
+    write(_COVER_TMPL % {
+        'date':     generated_date,
+        'city':     city_name,
+        'duration': duration,
+        'dek':      cover_dek_text,
+        'stats':    cover_stats,
+        'location': safe_location,
+        'footer':   cover_footer_sections,
+    })
+
+    # Sections render in fixed order; each present one takes the next numeral
+    numerals = iter(('I', 'II', 'III'))
 
     # ── PHOTOGRAPHY ──
     if photos:
-        roman_num = roman[section_idx]; section_idx += 1
-        html += f"""
+        roman_num = next(numerals)
+        write(f"""
     <!-- ── PHOTOGRAPHY ── -->
     <div class="section">
         <div class="section-header">
@@ -2052,48 +2545,34 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                 <p class="section-subtitle">Locations, composition &amp; timing</p>
             </div>
         </div>
-"""
-        photos_by_day = defaultdict(list)
-        for photo in photos:
-            photos_by_day[photo.get('day', 1)].append(photo)
-
-        for day_num in sorted(photos_by_day.keys()):
-            day_photos = photos_by_day[day_num]
-            html += f"""
-        <div class="day-divider">
-            <span class="day-divider-label">Day {day_num}</span>
-            <div class="day-divider-rule"></div>
-        </div>"""
+""")
+        for day_num, day_photos in groupby(sorted(photos, key=_item_day), key=_item_day):
+            day_photos = list(day_photos)
+            write(_DAY_DIVIDER_TMPL % {'day': day_num})
 
-            _map_data = (prefetched_maps or {}).get(('photos', day_num))
+            _map_data = maps.get(('photos', day_num))
             map_img   = build_day_map_html(*_map_data) if _map_data else ''
             if map_img:
                 count_label = f"{len(day_photos)} location{'s' if len(day_photos) != 1 else ''}"
-                html += f"""
-        <div class="day-map">
-            <div class="day-map-label">
-                <svg width="12" height="12" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5"><path d="M21 10c0 7-9 13-9 13s-9-6-9-13a9 9 0 0 1 18 0z"/><circle cx="12" cy="10" r="3"/></svg>
-                Day {day_num} Photo Locations &mdash; {count_label}
-            </div>
-            {map_img}
-        </div>"""
+                write(_DAY_MAP_TMPL % {'day': day_num, 'label': 'Photo Locations',
+                                       'count_label': count_label, 'map_img': map_img})
 
             for photo in day_photos:
-                fallback_maps_url = create_google_maps_link(
-                    photo.get('name', ''), photo.get('address', ''),
-                    f"{photo.get('lat', '')},{photo.get('lng', '')}")
+                get = photo.get
                 badge, notice, confirmed_url = _verification_badge_html(photo)
-                maps_url = escape(confirmed_url or fallback_maps_url)
+                maps_url = escape(confirmed_url or create_google_maps_link(
+                    get('name', ''), get('address', ''),
+                    f"{get('lat', '')},{get('lng', '')}"))
 
                 # Google Earth link (server-side constructed from lat/lng)
-                earth_url = escape(photo.get('google_earth_url', ''))
+                earth_url = escape(get('google_earth_url', ''))
                 earth_link_html = (
                     f'<a href="{earth_url}" target="_blank" rel="noopener noreferrer">'
                     f'Scout on Google Earth</a>'
                 ) if earth_url else ''
 
                 # Distance from accommodation
-                dist_from_acc = photo.get('distance_from_accommodation', '')
+                dist_from_acc = get('distance_from_accommodation', '')
                 dist_html = (
                     f'<div class="meta-cell">'
                     f'<span class="meta-label">From Accommodation</span>'
@@ -2101,9 +2580,9 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                 ) if dist_from_acc and dist_from_acc.upper() != 'N/A' else ''
 
                 # Required gear badges
-                required_gear = photo.get('required_gear') or []
+                required_gear = get('required_gear') or []
                 gear_badges = ''.join(
-                    f'<span class="item-card-tag" style="margin-top:4px;">{escape(str(g))}</span>'
+                    f'<span class="item-card-tag" style="margin-top:4px;">{_escape_cached(str(g))}</span>'
                     for g in required_gear
                 )
                 gear_html = (
@@ -2114,15 +2593,16 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                 ) if gear_badges else ''
 
                 # ── Multi-shot or single-shot content ─────────────────────
-                shots = photo.get('shots')
+                shots = get('shots')
                 if shots and isinstance(shots, list):
                     # New multi-shot format: 'shots' array per location
-                    shots_html = ''
+                    shot_blocks = []
                     for shot_i, shot in enumerate(shots, 1):
-                        shots_html += (
+                        shot_title = shot.get('title')
+                        shot_blocks.append(
                             f'<div class="shot-block">'
                             f'<div class="shot-number">Shot {shot_i}'
-                            + (f' — {_e(shot.get("title", ""))}' if shot.get('title') else '')
+                            + (f' — {_e(shot_title)}' if shot_title else '')
                             + f'</div>'
                             f'<div class="full-field"><span class="meta-label">The Shot</span>'
                             f'{_e(shot.get("the_shot"))}</div>'
@@ -2132,49 +2612,36 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                             f'{_e(shot.get("the_settings"))}</div>'
                             f'</div>'
                         )
+                    shots_html = ''.join(shot_blocks)
                 else:
                     # Backward compat: old single-shot flat structure
                     shots_html = (
                         f'<div class="full-field"><span class="meta-label">The Shot</span>'
-                        f'{_e(photo.get("the_shot"))}</div>'
+                        f'{_e(get("the_shot"))}</div>'
                         f'<div class="full-field"><span class="meta-label">The Setup</span>'
-                        f'{_e(photo.get("the_setup"))}</div>'
+                        f'{_e(get("the_setup"))}</div>'
                         f'<div class="full-field"><span class="meta-label">The Settings</span>'
-                        f'{_e(photo.get("the_settings"))}</div>'
+                        f'{_e(get("the_settings"))}</div>'
                     )
 
-                html += f"""
-        <div class="item-card">
-            <div class="item-card-head">
-                <h3 class="item-card-title">{_e(photo.get('name'), 'Location')}</h3>
-                <div style="display:flex;gap:6px;align-items:center;flex-shrink:0;">
-                    {badge}
-                    <span class="item-card-tag highlight">{_e(photo.get('shoot_window'), '')}</span>
-                </div>
-            </div>
-            <div class="item-card-body">
-                {shots_html}
-                <div class="tip-box">
-                    <span class="meta-label">The Reality Check</span>
-                    {_e(photo.get('the_reality_check'))}
-                </div>
-                {gear_html}
-                <div class="item-meta-grid">
-                    {dist_html}
-                </div>
-                {notice}
-                <div class="maps-link" style="display:flex;gap:24px;flex-wrap:wrap;">
-                    <a href="{maps_url}" target="_blank" rel="noopener noreferrer">View on Google Maps</a>
-                    {earth_link_html}
-                </div>
-            </div>
-        </div>"""
-        html += "\n    </div>\n"
+                write(_PHOTO_CARD_TMPL % {
+                    'name':            _e(get('name'), 'Location'),
+                    'badge':           badge,
+                    'shoot_window':    _e(get('shoot_window'), ''),
+                    'shots_html':      shots_html,
+                    'reality_check':   _e(get('the_reality_check')),
+                    'gear_html':       gear_html,
+                    'dist_html':       dist_html,
+                    'notice':          notice,
+                    'maps_url':        maps_url,
+                    'earth_link_html': earth_link_html,
+                })
+        write("\n    </div>\n")
 
     # ── DINING ──
     if restaurants:
-        roman_num = roman[section_idx]; section_idx += 1
-        html += f"""
+        roman_num = next(numerals)
+        write(f"""
     <!-- ── DINING ── -->
     <div class="section">
         <div class="section-header">
@@ -2184,26 +2651,22 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                 <p class="section-subtitle">Restaurants &amp; local cuisine</p>
             </div>
         </div>
-"""
+""")
         current_day = 0
         for restaurant in restaurants:
-            day = restaurant.get('day', current_day)
+            get = restaurant.get
+            day = get('day', current_day)
             if day != current_day:
                 current_day = day
-                html += f"""
-        <div class="day-divider">
-            <span class="day-divider-label">Day {current_day}</span>
-            <div class="day-divider-rule"></div>
-        </div>"""
+                write(_DAY_DIVIDER_TMPL % {'day': current_day})
 
-            fallback_maps_url = create_google_maps_link(
-                restaurant.get('name', ''), restaurant.get('address', ''), '')
             badge, notice, confirmed_url = _verification_badge_html(restaurant)
-            maps_url      = escape(confirmed_url or fallback_maps_url)
-            meal          = _e(restaurant.get('meal_type'), '').title()
-            price         = _e(restaurant.get('price'), '')
-            r_travel_time = restaurant.get('travel_time', '')
-            r_why_client  = restaurant.get('why_this_client', '')
+            maps_url      = escape(confirmed_url or create_google_maps_link(
+                get('name', ''), get('address', ''), ''))
+            meal          = _e(get('meal_type'), '').title()
+            price         = _e(get('price'), '')
+            r_travel_time = get('travel_time', '')
+            r_why_client  = get('why_this_client', '')
             r_travel_html = (
                 f'<div class="meta-cell"><span class="meta-label">From Accommodation</span>'
                 f'<span class="meta-value">{_e(r_travel_time)}</span></div>'
@@ -2213,57 +2676,28 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                 f'<span class="meta-label">Why For This Client</span>'
                 f'{_e(r_why_client)}</div>'
             ) if r_why_client else ''
-            html += f"""
-        <div class="item-card">
-            <div class="item-card-head">
-                <h3 class="item-card-title">{_e(restaurant.get('name'), 'Restaurant')}</h3>
-                <div style="display:flex;gap:6px;flex-shrink:0;align-items:center;">
-                    {badge}
-                    {f'<span class="item-card-tag highlight">{meal}</span>' if meal else ''}
-                    {f'<span class="item-card-tag price-tag">{price}</span>' if price else ''}
-                </div>
-            </div>
-            <div class="item-card-body">
-                <div class="full-field">
-                    <span class="meta-label">About</span>
-                    {_e(restaurant.get('description'))}
-                </div>
-                <div class="item-meta-grid">
-                    <div class="meta-cell">
-                        <span class="meta-label">Cuisine</span>
-                        <span class="meta-value">{_e(restaurant.get('cuisine'))}</span>
-                    </div>
-                    <div class="meta-cell">
-                        <span class="meta-label">Neighbourhood</span>
-                        <span class="meta-value">{_e(restaurant.get('location'))}</span>
-                    </div>
-                    <div class="meta-cell">
-                        <span class="meta-label">Hours</span>
-                        <span class="meta-value">{_e(restaurant.get('hours'))}</span>
-                    </div>
-                    <div class="meta-cell">
-                        <span class="meta-label">Signature Dish</span>
-                        <span class="meta-value">{_e(restaurant.get('signature_dish'))}</span>
-                    </div>
-                    {r_travel_html}
-                </div>
-                {r_why_html}
-                <div class="tip-box">
-                    <span class="meta-label">Insider Tip</span>
-                    {_e(restaurant.get('insider_tip'))}
-                </div>
-                {notice}
-                <div class="maps-link">
-                    <a href="{maps_url}" target="_blank" rel="noopener noreferrer">View on Google Maps</a>
-                </div>
-            </div>
-        </div>"""
-        html += "\n    </div>\n"
+            write(_RESTAURANT_CARD_TMPL % {
+                'name':           _e(get('name'), 'Restaurant'),
+                'badge':          badge,
+                'meal_tag':       f'<span class="item-card-tag highlight">{meal}</span>' if meal else '',
+                'price_tag':      f'<span class="item-card-tag price-tag">{price}</span>' if price else '',
+                'description':    _e(get('description')),
+                'cuisine':        _e(get('cuisine')),
+                'neighbourhood':  _e(get('location')),
+                'hours':          _e(get('hours')),
+                'signature_dish': _e(get('signature_dish')),
+                'travel_html':    r_travel_html,
+                'why_html':       r_why_html,
+                'insider_tip':    _e(get('insider_tip')),
+                'notice':         notice,
+                'maps_url':       maps_url,
+            })
+        write("\n    </div>\n")
 
     # ── ATTRACTIONS ──
     if attractions:
-        roman_num = roman[section_idx]; section_idx += 1
-        html += f"""
+        roman_num = next(numerals)
+        write(f"""
     <!-- ── ATTRACTIONS ── -->
     <div class="section">
         <div class="section-header">
@@ -2273,39 +2707,25 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                 <p class="section-subtitle">Things to see &amp; do</p>
             </div>
         </div>
-"""
-        attractions_by_day = defaultdict(list)
-        for attraction in attractions:
-            attractions_by_day[attraction.get('day', 1)].append(attraction)
-
-        for day_num in sorted(attractions_by_day.keys()):
-            day_attractions = attractions_by_day[day_num]
-            html += f"""
-        <div class="day-divider">
-            <span class="day-divider-label">Day {day_num}</span>
-            <div class="day-divider-rule"></div>
-        </div>"""
+""")
+        for day_num, day_attractions in groupby(sorted(attractions, key=_item_day), key=_item_day):
+            day_attractions = list(day_attractions)
+            write(_DAY_DIVIDER_TMPL % {'day': day_num})
 
-            _map_data = (prefetched_maps or {}).get(('attractions', day_num))
+            _map_data = maps.get(('attractions', day_num))
             map_img   = build_day_map_html(*_map_data) if _map_data else ''
             if map_img:
                 count_label = f"{len(day_attractions)} stop{'s' if len(day_attractions) != 1 else ''}"
-                html += f"""
-        <div class="day-map">
-            <div class="day-map-label">
-                <svg width="12" height="12" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5"><path d="M21 10c0 7-9 13-9 13s-9-6-9-13a9 9 0 0 1 18 0z"/><circle cx="12" cy="10" r="3"/></svg>
-                Day {day_num} Attractions &mdash; {count_label}
-            </div>
-            {map_img}
-        </div>"""
+                write(_DAY_MAP_TMPL % {'day': day_num, 'label': 'Attractions',
+                                       'count_label': count_label, 'map_img': map_img})
 
             for attraction in day_attractions:
-                fallback_maps_url = create_google_maps_link(
-                    attraction.get('name', ''), attraction.get('address', ''), '')
+                get = attraction.get
                 badge, notice, confirmed_url = _verification_badge_html(attraction)
-                maps_url      = escape(confirmed_url or fallback_maps_url)
-                a_travel_time = attraction.get('travel_time', '')
-                a_why_client  = attraction.get('why_this_client', '')
+                maps_url      = escape(confirmed_url or create_google_maps_link(
+                    get('name', ''), get('address', ''), ''))
+                a_travel_time = get('travel_time', '')
+                a_why_client  = get('why_this_client', '')
                 a_travel_html = (
                     f'<div class="meta-cell"><span class="meta-label">From Accommodation</span>'
                     f'<span class="meta-value">{_e(a_travel_time)}</span></div>'
@@ -2315,71 +2735,32 @@ def generate_master_html(location, duration, photos, restaurants=None, attractio
                     f'<span class="meta-label">Why For This Client</span>'
                     f'{_e(a_why_client)}</div>'
                 ) if a_why_client else ''
-                html += f"""
-        <div class="item-card">
-            <div class="item-card-head">
-                <h3 class="item-card-title">{_e(attraction.get('name'), 'Attraction')}</h3>
-                <div style="display:flex;gap:6px;flex-shrink:0;align-items:center;">
-                    {badge}
-                    <span class="item-card-tag highlight">{_e(attraction.get('time'), '')}</span>
-                    <span class="item-card-tag">{_e(attraction.get('admission'), '')}</span>
-                </div>
-            </div>
-            <div class="item-card-body">
-                <div class="meta-cell">
-                    <span class="meta-label">About</span>
-                    <span class="meta-value">{_e(attraction.get('description'))}</span>
-                </div>
-                <div class="item-meta-grid">
-                    <div class="meta-cell">
-                        <span class="meta-label">Category</span>
-                        <span class="meta-value">{_e(attraction.get('category'))}</span>
-                    </div>
-                    <div class="meta-cell">
-                        <span class="meta-label">Hours</span>
-                        <span class="meta-value">{_e(attraction.get('hours'))}</span>
-                    </div>
-                    <div class="meta-cell">
-                        <span class="meta-label">Time Needed</span>
-                        <span class="meta-value">{_e(attraction.get('duration'))}</span>
-                    </div>
-                    <div class="meta-cell">
-                        <span class="meta-label">Best Time to Visit</span>
-                        <span class="meta-value">{_e(attraction.get('best_time'))}</span>
-                    </div>
-                    {a_travel_html}
-                </div>
-                {a_why_html}
-                <div class="tip-box">
-                    <span class="meta-label">Highlight &amp; Insider Tip</span>
-                    <strong>{_e(attraction.get('highlight'))}</strong> &mdash; {_e(attraction.get('insider_tip'))}
-                </div>
-                {notice}
-                <div class="maps-link">
-                    <a href="{maps_url}" target="_blank" rel="noopener noreferrer">View on Google Maps</a>
-                </div>
-            </div>
-        </div>"""
-        html += "\n    </div>\n"
-
-    html += f"""
-
-    <!-- ── FOOTER ── -->
-    <div class="doc-footer">
-        <div>
-            <div class="doc-footer-brand">Trip Master</div>
-            <div style="margin-top:6px;">{safe_location} &middot; {duration} Days</div>
-        </div>
-        <div class="doc-footer-right">
-            <div>Generated {generated_date}</div>
-            <div style="margin-top:4px;">Powered by Claude AI</div>
-        </div>
-    </div>
-
-</body>
-</html>
-"""
-    return html
+                write(_ATTRACTION_CARD_TMPL % {
+                    'name':        _e(get('name'), 'Attraction'),
+                    'badge':       badge,
+                    'time':        _e(get('time'), ''),
+                    'admission':   _e(get('admission'), ''),
+                    'description': _e(get('description')),
+                    'category':    _e(get('category')),
+                    'hours':       _e(get('hours')),
+                    'duration':    _e(get('duration')),
+                    'best_time':   _e(get('best_time')),
+                    'travel_html': a_travel_html,
+                    'why_html':    a_why_html,
+                    'highlight':   _e(get('highlight')),
+                    'insider_tip': _e(get('insider_tip')),
+                    'notice':      notice,
+                    'maps_url':    maps_url,
+                })
+        write("\n    </div>\n")
+
+    write(_DOC_FOOTER_TMPL % {'location': safe_location, 'duration': duration, 'date': generated_date})
+    if out is None:
+        html = ''.join(parts)
+        if render_key is not None:
+            with _local_lock:
+                _render_cache[render_key] = html
+        return html
 
 
 # ---------------------------------------------------------------------------
@@ -2424,7 +2805,7 @@ async def health():
 
 @app.get('/gear-profiles')
 async def list_gear_profiles(
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """List all gear profiles belonging to the authenticated staff user."""
@@ -2440,7 +2821,7 @@ async def list_gear_profiles(
 @app.post('/gear-profiles')
 async def create_gear_profile(
     body: GearProfileCreate,
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Create a new gear profile for the authenticated staff user."""
@@ -2465,7 +2846,7 @@ async def create_gear_profile(
 async def update_gear_profile(
     profile_id: int,
     body: GearProfileUpdate,
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Update an existing gear profile owned by the authenticated staff user."""
@@ -2491,7 +2872,7 @@ async def update_gear_profile(
 @app.delete('/gear-profiles/{profile_id}')
 async def delete_gear_profile(
     profile_id: int,
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Delete a gear profile owned by the authenticated staff user."""
@@ -2510,13 +2891,16 @@ async def delete_gear_profile(
 @app.post('/generate')
 async def generate_trip_guide(
     body: GenerateRequest,
-    current_user: StaffUser = Depends(get_current_user),
+    idempotency_key: str | None = Header(None, max_length=128),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Enqueue a scout job and return a job_id immediately (< 200 ms).
 
-    The client polls GET /jobs/{job_id} every 2 seconds until status == 'done',
+    The client long-polls GET /jobs/{job_id}?wait=25 until status == 'done',
     then uses the returned results exactly as it used to use the direct response.
+    An Idempotency-Key header (default: a digest of the request body) makes
+    retries return the job already in flight for the same request.
     Requires login.
     """
     # Per-user rate limit — checked before queueing so we don't waste resources
@@ -2527,9 +2911,20 @@ async def generate_trip_guide(
         raise HTTPException(
             status_code=429,
             detail=f'Too many requests. Please wait {retry_after} seconds before trying again.',
+            headers={'Retry-After': str(retry_after)},
         )
 
-    job_id = str(uuid.uuid4())
+    params   = body.model_dump()
+    job_id   = str(uuid.uuid4())
+    idem_key = '%d:%s' % (current_user.id, idempotency_key or hashlib.blake2b(
+        _dumps(params, option=orjson.OPT_SORT_KEYS), digest_size=16,
+    ).hexdigest())
+    existing = _job_claim(idem_key, job_id)
+    if existing is not None:
+        logger.info('Job %s reused for duplicate /generate (user_id=%d)',
+                    existing[:8], current_user.id)
+        return {'job_id': existing}
+
     _job_set(job_id, {
         'status':   'pending',
         'progress': 0,
@@ -2542,7 +2937,7 @@ async def generate_trip_guide(
     # Because all scout work is async I/O (Claude API + httpx), it does not block
     # the event loop — other HTTP requests are served normally while scouts run.
     asyncio.create_task(
-        _run_scouts_background(job_id, body.model_dump(), current_user.id)
+        _run_scouts_background(job_id, params, current_user.id)
     )
 
     logger.info('Job %s queued for %s %d days (user_id=%d)',
@@ -2553,11 +2948,17 @@ async def generate_trip_guide(
 @app.get('/jobs/{job_id}')
 async def poll_job(
     job_id: str,
-    current_user: StaffUser = Depends(get_current_user),
+    response: Response,
+    wait: float = Query(0, ge=0, le=JOB_WAIT_MAX),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Poll the status of a background scout job (requires login).
 
+    With ?wait=N (seconds, max 25) an unfinished job is held open until its
+    status, progress or message changes, so clients can re-poll immediately
+    instead of sleeping between requests.
+
     Returns:
         { status: 'pending'|'running'|'done'|'failed',
           progress: 0–100,
@@ -2566,11 +2967,15 @@ async def poll_job(
           error:    str   | null }  # present only when status == 'failed'
     """
     job = _job_get(job_id)
+    if job is not None and wait and job.get('status') in ('pending', 'running'):
+        job = await _job_wait(job_id, job, wait)
     if job is None:
         raise HTTPException(
             status_code=404,
             detail='Job not found or expired. Please generate a new guide.',
         )
+    if job.get('status') in ('pending', 'running'):
+        response.headers['Retry-After'] = '0' if wait else '2'
     return job
 
 
@@ -2579,11 +2984,10 @@ async def finalize_guide(
     body: FinalizeRequest,
     request: Request,
     db_session: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Filter approved items, prefetch maps, generate final HTML. Requires login."""
     try:
-        _evict_sessions()
         session_id = body.session_id.strip()
 
         # ── Resolve session: Redis/memory first, DB fallback ──────────────────
@@ -2598,7 +3002,8 @@ async def finalize_guide(
             logger.info('Finalize: session %s resolved from store', session_id[:8])
         elif session_id:
             db_trip = await run_in_threadpool(
-                lambda: db_session.query(Trip).filter_by(session_id=session_id, is_deleted=False).first()
+                _find_trip, db_session, body.trip_id, session_id,
+                'colors', 'raw_photos', 'raw_restaurants', 'raw_attractions',
             )
             if not db_trip:
                 raise HTTPException(
@@ -2607,10 +3012,10 @@ async def finalize_guide(
                 )
             location   = db_trip.location
             duration   = db_trip.duration
-            colors     = json.loads(db_trip.colors)           if db_trip.colors           else {}
-            all_photos = json.loads(db_trip.raw_photos)       if db_trip.raw_photos       else []
-            all_rests  = json.loads(db_trip.raw_restaurants)  if db_trip.raw_restaurants  else []
-            all_attrs  = json.loads(db_trip.raw_attractions)  if db_trip.raw_attractions  else []
+            colors     = _trip_json(db_trip, 'colors',          {})
+            all_photos = _trip_json(db_trip, 'raw_photos',      [])
+            all_rests  = _trip_json(db_trip, 'raw_restaurants', [])
+            all_attrs  = _trip_json(db_trip, 'raw_attractions', [])
             logger.info('Finalize: session %s resolved from DB (trip id=%d)', session_id[:8], db_trip.id)
         else:
             raise HTTPException(
@@ -2620,17 +3025,24 @@ async def finalize_guide(
 
         # ── Parse approved index arrays ───────────────────────────────────────
         def _parse_indices(raw, total):
+            # FinalizeRequest already validated these as list[int]
             if raw is None:
                 return list(range(total))
-            return [int(i) for i in raw if 0 <= int(i) < total]
+            return [i for i in raw if 0 <= i < total]
 
         approved_photo_idx = _parse_indices(body.approved_photos,      len(all_photos))
         approved_rest_idx  = _parse_indices(body.approved_restaurants,  len(all_rests))
         approved_attr_idx  = _parse_indices(body.approved_attractions,  len(all_attrs))
 
-        photos      = [all_photos[i] for i in approved_photo_idx]
-        restaurants = [all_rests[i]  for i in approved_rest_idx]
-        attractions = [all_attrs[i]  for i in approved_attr_idx]
+        def _pick(src, idx):
+            # itemgetter returns a bare item (not a tuple) for a single index
+            if len(idx) < 2:
+                return [src[i] for i in idx]
+            return list(itemgetter(*idx)(src))
+
+        photos      = _pick(all_photos, approved_photo_idx)
+        restaurants = _pick(all_rests,  approved_rest_idx)
+        attractions = _pick(all_attrs,  approved_attr_idx)
 
         logger.info('Finalizing session %s — %d photos, %d restaurants, %d attractions',
                     session_id[:8], len(photos), len(restaurants), len(attractions))
@@ -2639,20 +3051,17 @@ async def finalize_guide(
         prefetched_maps = {}
         if PLACES_VERIFY_ENABLED:
             sections_by_day = {}
-            for section, items in [('photos', photos), ('attractions', attractions)]:
-                by_day = defaultdict(list)
-                for item in items:
-                    by_day[item.get('day', 1)].append(item)
-                for day_num, day_items in by_day.items():
-                    sections_by_day[(section, day_num)] = day_items
+            for section, items in (('photos', photos), ('attractions', attractions)):
+                for day_num, day_items in groupby(sorted(items, key=_item_day), key=_item_day):
+                    sections_by_day[(section, day_num)] = list(day_items)
             if sections_by_day:
                 logger.info('Pre-fetching %d day map image(s)...', len(sections_by_day))
                 prefetched_maps = await prefetch_day_maps(sections_by_day)
 
-        # ── Generate HTML (CPU-bound sync — run in threadpool) ───────────────
+        # ── Generate HTML (CPU-bound sync — run on the render pool) ──────────
         logger.info('Generating final HTML...')
-        html_content = await run_in_threadpool(
-            generate_master_html,
+        html_content = await asyncio.get_running_loop().run_in_executor(
+            _html_pool, generate_master_html,
             location, duration, photos, restaurants, attractions,
             colors, prefetched_maps,
         )
@@ -2664,9 +3073,9 @@ async def finalize_guide(
                     saved_trip = db_session.get(Trip, int(body.trip_id))
                     if saved_trip and not saved_trip.is_deleted:
                         saved_trip.status                      = 'finalized'
-                        saved_trip.approved_photo_indices      = json.dumps(approved_photo_idx)
-                        saved_trip.approved_restaurant_indices = json.dumps(approved_rest_idx)
-                        saved_trip.approved_attraction_indices = json.dumps(approved_attr_idx)
+                        saved_trip.approved_photo_indices      = approved_photo_idx
+                        saved_trip.approved_restaurant_indices = approved_rest_idx
+                        saved_trip.approved_attraction_indices = approved_attr_idx
                         saved_trip.final_html                  = html_content
                         saved_trip.updated_at                  = datetime.now(timezone.utc)
                         db_session.commit()
@@ -2676,6 +3085,16 @@ async def finalize_guide(
             except Exception as db_exc:
                 logger.error('Failed to finalize trip in DB: %s', db_exc)
 
+        # Browsers asking for text/html get the document as the body, skipping
+        # a JSON escape/unescape pass over it; metadata rides in headers.
+        if 'text/html' in request.headers.get('accept', ''):
+            meta = (
+                urllib.parse.quote(location), str(duration), str(len(photos)),
+                str(len(restaurants)), str(len(attractions)),
+                urllib.parse.quote(SCOUT_MODEL_LABEL),
+            )
+            return HTMLResponse(html_content, headers=dict(zip(_FINALIZE_META_HEADERS, meta)))
+
         return {
             'status':           'success',
             'html':             html_content,
@@ -2699,7 +3118,7 @@ async def replace_item(
     body: ReplaceRequest,
     request: Request,
     db_session: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Replace a single review-screen item with an alternative. Requires login."""
     try:
@@ -2711,6 +3130,7 @@ async def replace_item(
             raise HTTPException(
                 status_code=429,
                 detail=f'Too many requests. Please wait {retry_after} seconds before trying again.',
+                headers={'Retry-After': str(retry_after)},
             )
 
         session_id = body.session_id.strip()
@@ -2725,13 +3145,21 @@ async def replace_item(
         interests = cuisines_str = categories = ''
         duration  = 1
 
-        db_trip = None
-        if body.trip_id is not None:
-            db_trip = await run_in_threadpool(lambda: db_session.get(Trip, int(body.trip_id)))
-        if db_trip is None and session_id:
-            db_trip = await run_in_threadpool(
-                lambda: db_session.query(Trip).filter_by(session_id=session_id, is_deleted=False).first()
-            )
+        raw_field = _RAW_FIELD_BY_TYPE.get(item_type)
+
+        def _load_trip_and_client():
+            # One executor hop for both reads; the client lookup is best-effort
+            trip = _find_trip(db_session, body.trip_id, session_id,
+                              *((raw_field,) if raw_field else ()))
+            client = None
+            if trip and trip.client_id:
+                try:
+                    client = db_session.get(Client, trip.client_id)
+                except Exception as cp_exc:
+                    logger.warning('Replace: could not load client profile: %s', cp_exc)
+            return trip, client
+
+        db_trip, db_client = await run_in_threadpool(_load_trip_and_client)
 
         if db_trip:
             location     = db_trip.location
@@ -2757,43 +3185,38 @@ async def replace_item(
             raise HTTPException(status_code=400, detail='Could not resolve trip location.')
 
         # ── Build exclude_names from server-side DB data ──────────────────────
-        def _names_from_raw(raw_json: str | None) -> list[str]:
-            if not raw_json:
+        def _names_from_raw(field: str | None) -> list[str]:
+            if not field:
                 return []
             try:
-                items = json.loads(raw_json)
+                items = _trip_json(db_trip, field, [])
                 return [str(it['name']) for it in items if isinstance(it, dict) and it.get('name')]
             except Exception:
                 return []
 
         if db_trip:
-            raw_col = {
-                'photos':      db_trip.raw_photos,
-                'restaurants': db_trip.raw_restaurants,
-                'attractions': db_trip.raw_attractions,
-            }.get(item_type)
-            exclude_names = _names_from_raw(raw_col)
+            exclude_names = _names_from_raw(raw_field)
         else:
-            exclude_names = [
-                s for s in (
-                    re.sub(r'\s+', ' ', str(n)).strip()[:MAX_EXCLUDE_NAME_LEN]
-                    for n in _client_excludes if n
-                ) if s
-            ][:MAX_EXCLUDE_LIST_LEN]
+            # Single pass: collapse whitespace, drop blanks, stop at the cap
+            exclude_names = []
+            append, sub   = exclude_names.append, _WS_RE.sub
+            for n in _client_excludes:
+                if not n:
+                    continue
+                s = sub(' ', str(n)).strip()
+                if s:
+                    append(s[:MAX_EXCLUDE_NAME_LEN])
+                    if len(exclude_names) == MAX_EXCLUDE_LIST_LEN:
+                        break
 
         # ── Load client profile ───────────────────────────────────────────────
         client_profile = None
-        if db_trip and db_trip.client_id:
-            try:
-                db_client = await run_in_threadpool(lambda: db_session.get(Client, db_trip.client_id))
-                if db_client and not db_client.is_deleted:
-                    client_profile = {k: v for k, v in {
-                        'home_city':    db_client.home_city    or '',
-                        'travel_style': db_client.travel_style or '',
-                        'notes':        db_client.notes        or '',
-                    }.items() if v}
-            except Exception as cp_exc:
-                logger.warning('Replace: could not load client profile: %s', cp_exc)
+        if db_client and not db_client.is_deleted:
+            client_profile = {k: v for k, v in {
+                'home_city':    db_client.home_city    or '',
+                'travel_style': db_client.travel_style or '',
+                'notes':        db_client.notes        or '',
+            }.items() if v}
 
         # ── Validate item type — only photos supported after pivot ──────────────
         if item_type != 'photos':
@@ -2827,25 +3250,29 @@ async def replace_item(
         logger.info('Replace: type=%s idx=%d day=%d location=%s excluded=%d',
                     item_type, item_idx, day, location, len(exclude_names))
 
+        # Accommodation geocoding needs nothing from Claude or verification,
+        # so it runs alongside both and is awaited only for the distances.
+        accommodation_task = None
+        if db_trip and db_trip.accommodation and PLACES_VERIFY_ENABLED:
+            accommodation_task = asyncio.create_task(_geocode_accommodation(db_trip.accommodation))
+
         message = await anthropic_client.messages.create(
             model=SCOUT_MODEL,
             max_tokens=1500,
+            service_tier=SCOUT_SERVICE_TIER,
             tools=[replace_tool],
             tool_choice={'type': 'any'},
-            system=system_prompt,
+            system=_cached_system(system_prompt),
             messages=[{'role': 'user', 'content': user_prompt}],
         )
 
-        new_item = None
-        for block in message.content:
-            if block.type == 'tool_use' and block.name == replace_tool['name']:
-                candidates = block.input.get(items_key, [])
-                if candidates:
-                    new_item = candidates[0]
-                break
+        candidates = _tool_input(message, replace_tool).get(items_key, [])
+        new_item   = candidates[0] if candidates else None
 
         if not new_item:
             logger.warning('Replace Scout: no tool use block for %s idx=%d', item_type, item_idx)
+            if accommodation_task:
+                accommodation_task.cancel()
             raise HTTPException(
                 status_code=422,
                 detail='Could not find an alternative. Try again or toggle this item off.',
@@ -2869,8 +3296,8 @@ async def replace_item(
                 new_item = verified[0]
 
         # ── Apply haversine distance if accommodation available ───────────────
-        if db_trip and db_trip.accommodation and PLACES_VERIFY_ENABLED:
-            acc_lat, acc_lng = await _geocode_accommodation(db_trip.accommodation)
+        if accommodation_task:
+            acc_lat, acc_lng = await accommodation_task
             if acc_lat is not None:
                 _apply_distances([new_item], acc_lat, acc_lng)
                 new_item['distance_from_accommodation'] = new_item.get('travel_time', 'N/A')
@@ -2879,14 +3306,27 @@ async def replace_item(
         if db_trip:
             try:
                 def _update_db():
-                    raw_arr = json.loads(db_trip.raw_photos or '[]')
-                    if item_idx < len(raw_arr):
-                        raw_arr[item_idx] = new_item
-                        db_trip.raw_photos  = json.dumps(raw_arr)
-                        db_trip.updated_at  = datetime.now(timezone.utc)
-                        db_session.commit()
-                        logger.info('Replace: DB trip %d updated — photos[%d] replaced',
-                                    db_trip.id, item_idx)
+                    raw_arr = _trip_json(db_trip, 'raw_photos', [])
+                    if item_idx >= len(raw_arr):
+                        return
+                    set_elem = _JSON_ARRAY_SET.get(db_session.get_bind().dialect.name)
+                    if set_elem is not None:
+                        db_session.execute(
+                            update(Trip).where(Trip.id == db_trip.id).values(
+                                raw_photos = set_elem(Trip.raw_photos, item_idx,
+                                                      _dumps(new_item).decode()),
+                                updated_at = datetime.now(timezone.utc),
+                            ),
+                            execution_options={'synchronize_session': False},
+                        )
+                    else:
+                        raw_arr = list(raw_arr)
+                        raw_arr[item_idx]  = new_item
+                        db_trip.raw_photos = _dumps(raw_arr).decode()
+                        db_trip.updated_at = datetime.now(timezone.utc)
+                    db_session.commit()
+                    logger.info('Replace: DB trip %d updated — photos[%d] replaced',
+                                db_trip.id, item_idx)
 
                 await run_in_threadpool(_update_db)
             except Exception as db_exc:
@@ -1,18 +1,28 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import math
 import os
 import time
 import logging
 import threading
-from collections import defaultdict
-from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
 
 from redis_client import get_redis
 
 import bcrypt
 import jwt
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from starlette.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, load_only
 
 from database import get_db
 from models import StaffUser
@@ -23,99 +33,158 @@ COOKIE_NAME   = 'tm_token'
 TOKEN_TTL_H   = 8
 BCRYPT_ROUNDS = 12
 
+# bcrypt releases the GIL, so threads give real parallelism; a dedicated pool
+# keeps slow password checks from occupying the shared threadpool that every
+# DB call goes through.
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', str(os.cpu_count() or 1)))
+_bcrypt_pool   = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix='bcrypt')
+
 LOGIN_MAX_ATTEMPTS   = 10
 LOGIN_WINDOW_SECONDS = 300
 
-_login_attempts: dict = defaultdict(list)
-_login_lock = threading.Lock()
+# In-memory fallback: failure counts for the current fixed window only,
+# sharded by IP so concurrent logins from different addresses don't share a
+# lock. Each shard drops its dict when the window rolls over, so stale IPs
+# never linger.
+_LOGIN_SHARDS = 64
+
+
+class _LoginShard:
+    __slots__ = ('lock', 'window', 'counts')
+
+    def __init__(self):
+        self.lock   = threading.Lock()
+        self.window = 0
+        self.counts: dict[str, int] = {}
+
+    def current(self, bucket: int) -> dict[str, int]:
+        """Counts for `bucket`, resetting on window rollover. Hold self.lock."""
+        if bucket != self.window:
+            self.counts = {}
+            self.window = bucket
+        return self.counts
+
+
+_login_shards = [_LoginShard() for _ in range(_LOGIN_SHARDS)]
 
 
 # ---------------------------------------------------------------------------
-# Login rate limiting (Redis sorted sets + in-memory fallback)
+# Login rate limiting (Redis fixed-window counter + in-memory fallback)
 # ---------------------------------------------------------------------------
 
-def _check_login_rate_limit(ip: str) -> bool:
-    now = time.time()
+def _login_bucket() -> int:
+    return int(time.time() // LOGIN_WINDOW_SECONDS)
+
+
+def _check_and_record_login(ip: str, bucket: int) -> bool:
+    """Count this attempt against the IP's window; False once over the limit.
+
+    Counting up front makes the check and the failure record one round trip
+    (INCR + EXPIRE). A successful login hands its slot back via
+    _refund_login_attempt, so only failures accumulate.
+    """
     r = get_redis()
     if r is not None:
         try:
-            key = f"ratelimit:login:{ip}"
+            key = f"ratelimit:login:{ip}:{bucket}"
             pipe = r.pipeline()
-            pipe.zremrangebyscore(key, '-inf', now - LOGIN_WINDOW_SECONDS)
-            pipe.zcard(key)
+            pipe.incr(key)
             pipe.expire(key, LOGIN_WINDOW_SECONDS)
-            _, count, _ = pipe.execute()
-            return count < LOGIN_MAX_ATTEMPTS
+            count, _ = pipe.execute()
+            return count <= LOGIN_MAX_ATTEMPTS
         except Exception as exc:
-            logger.warning("Redis login rate-limit check error: %s — falling back", exc)
-    with _login_lock:
-        _login_attempts[ip] = [t for t in _login_attempts[ip] if now - t < LOGIN_WINDOW_SECONDS]
-        return len(_login_attempts[ip]) < LOGIN_MAX_ATTEMPTS
+            logger.warning("Redis login rate-limit error: %s — falling back", exc)
+    shard = _login_shards[hash(ip) % _LOGIN_SHARDS]
+    with shard.lock:
+        counts = shard.current(bucket)
+        counts[ip] = count = counts.get(ip, 0) + 1
+        return count <= LOGIN_MAX_ATTEMPTS
 
 
-def _record_login_failure(ip: str):
-    now = time.time()
+def _refund_login_attempt(ip: str, bucket: int) -> None:
     r = get_redis()
     if r is not None:
         try:
-            key = f"ratelimit:login:{ip}"
+            key = f"ratelimit:login:{ip}:{bucket}"
             pipe = r.pipeline()
-            pipe.zadd(key, {str(now): now})
+            pipe.decr(key)
             pipe.expire(key, LOGIN_WINDOW_SECONDS)
             pipe.execute()
             return
         except Exception as exc:
-            logger.warning("Redis login failure record error: %s — falling back", exc)
-    with _login_lock:
-        _login_attempts[ip].append(now)
+            logger.warning("Redis login refund error: %s — falling back", exc)
+    shard = _login_shards[hash(ip) % _LOGIN_SHARDS]
+    with shard.lock:
+        if bucket == shard.window and shard.counts.get(ip, 0) > 0:
+            shard.counts[ip] -= 1
 
 
 # ---------------------------------------------------------------------------
-# Per-user endpoint rate limiting (Redis sorted sets + in-memory fallback)
+# Per-user endpoint rate limiting (Redis token bucket + in-memory fallback)
 # ---------------------------------------------------------------------------
 
+# (max_requests, window_seconds): a bucket of max_requests tokens that refills
+# at max_requests / window per second, so bursts up to the cap are allowed and
+# the sustained rate matches the old sliding window.
 RATE_LIMIT_RULES: dict[str, tuple[int, int]] = {
     'generate': (20, 600),
     'replace':  (60, 600),
 }
 
-_user_requests: dict = defaultdict(list)
-_user_rate_lock = threading.Lock()
+# Refill, take one token and persist — atomically, in one round trip.
+# Returns {allowed, retry_after_seconds}.
+_TOKEN_BUCKET_LUA = """
+local b    = redis.call('HMGET', KEYS[1], 't', 'ts')
+local now  = tonumber(ARGV[1])
+local cap  = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local t    = tonumber(b[1]) or cap
+local ts   = tonumber(b[2]) or now
+t = math.min(cap, t + math.max(0, now - ts) * rate)
+if t < 1 then
+    return {0, math.ceil((1 - t) / rate)}
+end
+redis.call('HSET', KEYS[1], 't', t - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {1, 0}
+"""
+_token_bucket_script = None
+
+_user_buckets: dict[tuple[int, str], tuple[float, float]] = {}
+
+# Striped locks: the refill-and-take step is per bucket, so users only
+# contend when their keys hash to the same stripe.
+_USER_RATE_STRIPES = 64
+_user_rate_locks   = [threading.Lock() for _ in range(_USER_RATE_STRIPES)]
 
 
 def check_user_rate_limit(user_id: int, endpoint: str) -> tuple[bool, int]:
+    """Take one token from the user's bucket. Returns (allowed, retry_after)."""
+    global _token_bucket_script
     rule = RATE_LIMIT_RULES.get(endpoint)
     if rule is None:
         return True, 0
     max_requests, window = rule
-    now = time.time()
+    rate = max_requests / window
+    now  = time.time()
     r = get_redis()
     if r is not None:
         try:
-            rkey = f"ratelimit:user:{user_id}:{endpoint}"
-            pipe = r.pipeline()
-            pipe.zremrangebyscore(rkey, '-inf', now - window)
-            pipe.zrange(rkey, 0, -1, withscores=True)
-            pipe.expire(rkey, window)
-            _, entries, _ = pipe.execute()
-            count = len(entries)
-            if count >= max_requests:
-                oldest_score = min(score for _, score in entries)
-                retry_after = int(window - (now - oldest_score)) + 1
-                return False, retry_after
-            r.zadd(rkey, {str(now): now})
-            r.expire(rkey, window)
-            return True, 0
+            if _token_bucket_script is None:
+                _token_bucket_script = r.register_script(_TOKEN_BUCKET_LUA)
+            allowed, retry_after = _token_bucket_script(
+                keys=[f"rl:{endpoint}:{user_id}"], args=[now, max_requests, rate, window],
+            )
+            return bool(allowed), int(retry_after)
         except Exception as exc:
             logger.warning("Redis user rate-limit error: %s — falling back", exc)
     mem_key = (user_id, endpoint)
-    with _user_rate_lock:
-        _user_requests[mem_key] = [t for t in _user_requests[mem_key] if now - t < window]
-        if len(_user_requests[mem_key]) >= max_requests:
-            oldest = min(_user_requests[mem_key])
-            retry_after = int(window - (now - oldest)) + 1
-            return False, retry_after
-        _user_requests[mem_key].append(now)
+    with _user_rate_locks[hash(mem_key) % _USER_RATE_STRIPES]:
+        tokens, ts = _user_buckets.get(mem_key, (max_requests, now))
+        tokens = min(max_requests, tokens + (now - ts) * rate)
+        if tokens < 1:
+            return False, math.ceil((1 - tokens) / rate)
+        _user_buckets[mem_key] = (tokens - 1, now)
         return True, 0
 
 
@@ -127,55 +196,147 @@ def _secret() -> str:
     return os.getenv('JWT_SECRET_KEY', 'dev-secret-change-me')
 
 
+@lru_cache(maxsize=4)
+def _hmac_proto(secret: str) -> hmac.HMAC:
+    """Keyed HMAC-SHA256 with the ipad/opad setup done once per secret; copy() per token."""
+    return hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+
+def _b64url(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=')
+
+
+def _b64url_decode(seg: bytes) -> bytes:
+    return base64.urlsafe_b64decode(seg + b'=' * (-len(seg) % 4))
+
+
+def _sign(signing_input: bytes) -> bytes:
+    mac = _hmac_proto(_secret()).copy()
+    mac.update(signing_input)
+    return mac.digest()
+
+
+# Byte-identical to the header PyJWT emits for HS256, so tokens issued before
+# and after the hand-rolled signer verify the same way.
+_JWT_HEADER_B64 = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+
+
+_JWT_PAYLOAD_TMPL = b'{"sub":"%d","iat":%d,"exp":%d}'
+TOKEN_TTL_S       = TOKEN_TTL_H * 3600
+
+
 def _encode_token(user_id: int) -> str:
-    payload = {
-        'sub': str(user_id),
-        'iat': datetime.now(timezone.utc),
-        'exp': datetime.now(timezone.utc) + timedelta(hours=TOKEN_TTL_H),
-    }
-    return jwt.encode(payload, _secret(), algorithm='HS256')
+    now = int(time.time())
+    signing_input = _JWT_HEADER_B64 + b'.' + _b64url(_JWT_PAYLOAD_TMPL % (user_id, now, now + TOKEN_TTL_S))
+    return (signing_input + b'.' + _b64url(_sign(signing_input))).decode('ascii')
 
 
 def _decode_token(token: str) -> dict:
-    return jwt.decode(token, _secret(), algorithms=['HS256'])
+    """Verify an HS256 token issued by _encode_token; raises PyJWT's exception types."""
+    try:
+        signing_input, _, sig = token.encode('ascii').rpartition(b'.')
+        header_b64, _, payload_b64 = signing_input.partition(b'.')
+        if header_b64 != _JWT_HEADER_B64:
+            raise jwt.InvalidAlgorithmError('Unexpected token header')
+        if not hmac.compare_digest(_b64url_decode(sig), _sign(signing_input)):
+            raise jwt.InvalidSignatureError('Signature verification failed')
+        payload = json.loads(_b64url_decode(payload_b64))
+    except jwt.PyJWTError:
+        raise
+    except Exception as exc:
+        raise jwt.DecodeError('Invalid token') from exc
+    if not isinstance(payload, dict) or not isinstance(payload.get('exp'), int):
+        raise jwt.DecodeError('Invalid token payload')
+    if payload['exp'] <= time.time():
+        raise jwt.ExpiredSignatureError('Signature has expired')
+    return payload
 
 
 # ---------------------------------------------------------------------------
 # Cookie helper
 # ---------------------------------------------------------------------------
 
-def _set_auth_cookie(response: Response, token: str) -> None:
-    is_prod = os.getenv('ENVIRONMENT', os.getenv('FLASK_ENV', '')) == 'production'
-    response.set_cookie(
-        COOKIE_NAME,
-        token,
-        httponly=True,
-        samesite='lax',
-        secure=is_prod,
-        max_age=TOKEN_TTL_H * 3600,
-        path='/',
-    )
+@lru_cache(maxsize=1)
+def _cookie_kwargs() -> dict:
+    """set_cookie options, resolved once on first use (after app.py loads .env)."""
+    return {
+        'httponly': True,
+        'samesite': 'lax',
+        'secure':   os.getenv('ENVIRONMENT', os.getenv('FLASK_ENV', '')) == 'production',
+        'max_age':  TOKEN_TTL_H * 3600,
+        'path':     '/',
+    }
+
+
+def set_auth_cookie(response: Response, token: str) -> None:
+    response.set_cookie(COOKIE_NAME, token, **_cookie_kwargs())
 
 
 # ---------------------------------------------------------------------------
 # FastAPI dependency: get_current_user
 # ---------------------------------------------------------------------------
 
+# Methods that must carry X-Requested-With (CSRF guard)
+_STATE_CHANGING_METHODS = frozenset({'POST', 'PUT', 'DELETE', 'PATCH'})
+
+_CURRENT_USER_COLS = (
+    StaffUser.id, StaffUser.email, StaffUser.full_name, StaffUser.role,
+    StaffUser.is_active, StaffUser.created_at, StaffUser.last_login_at,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Immutable snapshot of the authenticated StaffUser, shareable across requests."""
+    id:            int
+    email:         str
+    full_name:     str
+    role:          str
+    is_active:     bool
+    created_at:    datetime | None
+    last_login_at: datetime | None
+
+    @classmethod
+    def from_model(cls, user: StaffUser) -> 'CurrentUser':
+        return cls(**{c.key: getattr(user, c.key) for c in _CURRENT_USER_COLS})
+
+    def to_dict(self) -> dict:
+        return StaffUser.to_dict(self)
+
+
+# (payload, CurrentUser) keyed by the raw cookie value. A browser sends the
+# same token on every request until the slide fires, so most requests skip
+# both the HMAC check and the user query; exp is still enforced on every hit.
+# Entries live TOKEN_CACHE_TTL seconds, which bounds how long a deactivation
+# made elsewhere (e.g. manage.py) can go unnoticed by this process.
+TOKEN_CACHE_TTL = 30
+_token_cache    = TTLCache(maxsize=4096, ttl=TOKEN_CACHE_TTL)
+_token_lock     = threading.Lock()
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop cached sessions for user_id so the next request re-reads the DB."""
+    with _token_lock:
+        for token in [t for t, (_, u) in _token_cache.items() if u.id == user_id]:
+            del _token_cache[token]
+
+
 async def get_current_user(
     request: Request,
     db_session: Session = Depends(get_db),
-) -> StaffUser:
+) -> CurrentUser:
     """
     FastAPI dependency that authenticates the incoming request.
 
     - Enforces X-Requested-With header on mutating methods (CSRF guard).
     - Reads the JWT from the session cookie.
     - Decodes and validates the token.
-    - Fetches the StaffUser from the database via run_in_threadpool.
-    - Stores a refreshed token on request.state.slide_token for middleware
-      to attach to the response cookie.
+    - Fetches the StaffUser from the database via run_in_threadpool and
+      returns a CurrentUser snapshot (cached per token for TOKEN_CACHE_TTL).
+    - Once the token is past half its TTL, stores a refreshed one on
+      request.state.slide_token for middleware to attach to the response cookie.
     """
-    if request.method in ('POST', 'PUT', 'DELETE', 'PATCH'):
+    if request.method in _STATE_CHANGING_METHODS:
         if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
             raise HTTPException(
                 status_code=403,
@@ -186,25 +347,43 @@ async def get_current_user(
     if not token:
         raise HTTPException(status_code=401, detail='Authentication required')
 
-    try:
-        payload = _decode_token(token)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail='Session expired — please log in again')
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail='Invalid token — please log in again')
+    with _token_lock:
+        cached = _token_cache.get(token)
+    if cached is not None:
+        payload, user = cached
+        if payload['exp'] <= time.time():
+            raise HTTPException(status_code=401, detail='Session expired — please log in again')
+    else:
+        try:
+            payload = _decode_token(token)
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail='Session expired — please log in again')
+        except jwt.PyJWTError:
+            raise HTTPException(status_code=401, detail='Invalid token — please log in again')
 
-    user_id = int(payload['sub'])
+        user_id = int(payload['sub'])
 
-    def _fetch_user() -> StaffUser | None:
-        return db_session.get(StaffUser, user_id)
+        def _fetch_user() -> StaffUser | None:
+            # Everything StaffUser.to_dict() reads — but never password_hash
+            return db_session.scalars(
+                select(StaffUser)
+                .options(load_only(*_CURRENT_USER_COLS))
+                .where(StaffUser.id == user_id)
+            ).first()
 
-    user = await run_in_threadpool(_fetch_user)
+        db_user = await run_in_threadpool(_fetch_user)
 
-    if not user or not user.is_active:
-        raise HTTPException(status_code=401, detail='Account not found or disabled')
+        if not db_user or not db_user.is_active:
+            raise HTTPException(status_code=401, detail='Account not found or disabled')
 
-    # Store a freshly-minted token so slide-refresh middleware can set it.
-    request.state.slide_token = _encode_token(user.id)
+        user = CurrentUser.from_model(db_user)
+        with _token_lock:
+            _token_cache[token] = (payload, user)
+
+    # Slide the session only once it is past half its lifetime; until then the
+    # existing cookie is left alone and no token is minted.
+    if payload['exp'] - time.time() < TOKEN_TTL_H * 1800:
+        request.state.slide_token = _encode_token(user.id)
 
     return user
 
@@ -225,11 +404,18 @@ class LoginRequest(BaseModel):
 auth_router = APIRouter(prefix='/auth', tags=['auth'])
 
 
+@lru_cache(maxsize=1)
+def _dummy_hash() -> bytes:
+    """A throwaway hash at BCRYPT_ROUNDS, built on first use (not at import)."""
+    return bcrypt.hashpw(os.urandom(16), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
+
 @auth_router.post('/login')
 async def login(
     body: LoginRequest,
     request: Request,
     response: Response,
+    background_tasks: BackgroundTasks,
     db_session: Session = Depends(get_db),
 ):
     forwarded_for = request.headers.get('X-Forwarded-For', '')
@@ -239,7 +425,8 @@ async def login(
         else (request.client.host if request.client else '')
     )
 
-    if not _check_login_rate_limit(client_ip):
+    login_bucket = _login_bucket()
+    if not _check_and_record_login(client_ip, login_bucket):
         raise HTTPException(
             status_code=429,
             detail='Too many login attempts. Please wait a few minutes.',
@@ -258,6 +445,9 @@ async def login(
 
     def _check_pw() -> bool:
         if not user:
+            # Same bcrypt cost as a real account, so response time doesn't
+            # reveal which emails exist.
+            bcrypt.checkpw(password.encode('utf-8'), _dummy_hash())
             return False
         try:
             return bcrypt.checkpw(
@@ -267,31 +457,50 @@ async def login(
         except Exception:
             return False
 
-    pw_ok = await run_in_threadpool(_check_pw)
+    pw_ok = await asyncio.get_running_loop().run_in_executor(_bcrypt_pool, _check_pw)
 
     if not user or not pw_ok or not user.is_active:
-        _record_login_failure(client_ip)
         raise HTTPException(status_code=401, detail='Invalid email or password')
 
-    def _update_last_login():
-        user.last_login_at = datetime.now(timezone.utc)
-        db_session.commit()
+    _refund_login_attempt(client_ip, login_bucket)
 
-    await run_in_threadpool(_update_last_login)
+    # last_login_at is bookkeeping, so its commit runs after the response is
+    # sent. The request session is closed by then, but a closed Session starts
+    # a fresh transaction on next use.
+    login_at = datetime.now(timezone.utc)
+
+    def _update_last_login(user_id: int):
+        try:
+            db_session.execute(
+                update(StaffUser).where(StaffUser.id == user_id).values(last_login_at=login_at)
+            )
+            db_session.commit()
+        except Exception as exc:
+            db_session.rollback()
+            logger.warning("Login: last_login_at update failed for user_id=%d: %s", user_id, exc)
+        finally:
+            db_session.close()
+        invalidate_user(user_id)   # cached snapshots carry the old last_login_at
+
+    background_tasks.add_task(_update_last_login, user.id)
 
     token = _encode_token(user.id)
-    _set_auth_cookie(response, token)
+    set_auth_cookie(response, token)
 
     logger.info("Login: user_id=%d authenticated", user.id)
-    return {'status': 'ok', 'user': user.to_dict()}
+    return {'status': 'ok', 'user': {**user.to_dict(), 'last_login_at': login_at.isoformat()}}
 
 
 @auth_router.post('/logout')
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    token = request.cookies.get(COOKIE_NAME)
+    if token:
+        with _token_lock:
+            _token_cache.pop(token, None)
     response.delete_cookie(COOKIE_NAME, path='/')
     return {'status': 'ok'}
 
 
 @auth_router.get('/me')
-async def me(current_user: StaffUser = Depends(get_current_user)):
+async def me(current_user: CurrentUser = Depends(get_current_user)):
     return {'user': current_user.to_dict()}
@@ -1,19 +1,24 @@
 import logging
 from datetime import datetime, timezone
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from starlette.concurrency import run_in_threadpool
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from database import get_db
-from auth import get_current_user
+from auth import CurrentUser, get_current_user
 from schemas import ClientCreate, ClientUpdate
-from models import Client, StaffUser
+from models import Client
 
 logger = logging.getLogger(__name__)
 
 clients_router = APIRouter(prefix='/clients', tags=['clients'])
 
+CLIENT_STREAM_BATCH = 200
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
@@ -45,24 +50,38 @@ def _client_or_404(db: Session, client_id: int) -> Client:
 @clients_router.get('')
 async def list_clients(
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    clients = await run_in_threadpool(
-        lambda: (
-            db.query(Client)
-            .filter_by(is_deleted=False)
-            .order_by(Client.created_at.desc())
-            .all()
-        )
-    )
-    return {'clients': [c.to_dict() for c in clients]}
+    # Streamed in batches of CLIENT_STREAM_BATCH rows, each encoded straight to
+    # bytes with orjson, so the full row list and its dict copies are never
+    # held at once. get_db has already closed the session by the time the body
+    # is sent; a closed Session starts a fresh transaction on use, so the
+    # generator closes it again when it finishes.
+    def _body():
+        try:
+            yield b'{"clients":['
+            rows = db.scalars(
+                select(Client)
+                .where(Client.is_deleted.is_(False))
+                .order_by(Client.created_at.desc())
+                .execution_options(yield_per=CLIENT_STREAM_BATCH)
+            )
+            sep = b''
+            for batch in rows.partitions():
+                yield sep + b','.join(orjson.dumps(c.to_dict()) for c in batch)
+                sep = b','
+            yield b']}'
+        finally:
+            db.close()
+
+    return StreamingResponse(iterate_in_threadpool(_body()), media_type='application/json')
 
 
 @clients_router.post('', status_code=201)
 async def create_client(
     body: ClientCreate,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     def _create():
         client = Client(
@@ -93,7 +112,7 @@ async def create_client(
 async def get_client(
     client_id: int,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     client = await run_in_threadpool(lambda: _client_or_404(db, client_id))
     return {'client': client.to_dict(include_trips=True)}
@@ -104,7 +123,7 @@ async def update_client(
     client_id: int,
     body: ClientUpdate,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     def _update():
         client = _client_or_404(db, client_id)
@@ -130,7 +149,7 @@ async def update_client(
 async def delete_client(
     client_id: int,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     def _delete():
         client = _client_or_404(db, client_id)
@@ -26,9 +26,20 @@ export async function generateFinalGuide() {
                 trip_id:         state.rawData.trip_id || null,
                 approved_photos: approvedPhotos,
             }),
+            // Ask for the raw document; metadata comes back in X-* headers
+            headers: { 'Accept': 'text/html' },
         });
-        const result = await response.json();
-        if (!response.ok) throw new Error(result.error || 'Failed to generate final guide');
+        if (!response.ok) {
+            const err = await response.json().catch(() => ({}));
+            throw new Error(err.error || 'Failed to generate final guide');
+        }
+        const h = response.headers;
+        const result = {
+            html:        await response.text(),
+            location:    decodeURIComponent(h.get('X-Location') || ''),
+            duration:    Number(h.get('X-Duration')),
+            photo_count: Number(h.get('X-Photo-Count')),
+        };
 
         document.getElementById('finalizing').classList.remove('active');
         // Refresh saved trips in background (dynamic import avoids static circular dep with trips.js)
@@ -15,18 +15,19 @@ import { showReviewScreen } from './review.js';
 import { loadSavedTrips } from './trips.js';
 
 /**
- * pollJobUntilDone — polls GET /jobs/{job_id} every 2 s until done or failed.
- * Times out after 4 minutes (120 polls).
+ * pollJobUntilDone — long-polls GET /jobs/{job_id}?wait=25 until done or failed.
+ * The server answers as soon as the job's progress changes, so each response
+ * is followed immediately by the next poll. Times out after 4 minutes.
  */
 async function pollJobUntilDone(jobId) {
-    const MAX_POLLS = 120;
+    const TIMEOUT_MS = 4 * 60 * 1000;
+    const deadline   = Date.now() + TIMEOUT_MS;
     const msgEl = document.getElementById('loadingMessage');
 
-    for (let i = 0; i < MAX_POLLS; i++) {
-        await sleep(2000);
+    while (Date.now() < deadline) {
         let resp, job;
         try {
-            resp = await apiFetch(`/jobs/${jobId}`);
+            resp = await apiFetch(`/jobs/${jobId}?wait=25`);
             job  = await resp.json();
         } catch {
             throw new Error('Lost connection while generating. Please try again.');
@@ -35,6 +36,7 @@ async function pollJobUntilDone(jobId) {
         if (job.message && msgEl) msgEl.textContent = job.message;
         if (job.status === 'done')   return job.results;
         if (job.status === 'failed') throw new Error(job.error || 'Generation failed');
+        await sleep(250);   // don't spin if a server answers without holding
     }
     throw new Error('Generation timed out after 4 minutes. Please try again.');
 }
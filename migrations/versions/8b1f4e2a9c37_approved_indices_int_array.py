@@ -0,0 +1,57 @@
+"""approved_indices_int_array
+
+Revision ID: 8b1f4e2a9c37
+Revises: dcc6439ee150
+Create Date: 2026-10-16 10:12:41.118203
+
+Changes:
+- trips.approved_photo_indices, approved_restaurant_indices and
+  approved_attraction_indices: Text (JSON string) → INTEGER[] on PostgreSQL
+
+SQLite note: the model maps these columns to sqlalchemy.JSON on SQLite, which
+is stored as TEXT and reads the existing '[0,2,4]' strings unchanged, so no
+table rebuild is needed there and this revision is a no-op.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1f4e2a9c37'
+down_revision: Union[str, None] = 'dcc6439ee150'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    'approved_photo_indices',
+    'approved_restaurant_indices',
+    'approved_attraction_indices',
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # '[0, 2, 4]' → '{0, 2, 4}' is a valid int[] literal
+    for col in _COLUMNS:
+        op.alter_column(
+            'trips', col,
+            existing_type=sa.Text(),
+            type_=postgresql.ARRAY(sa.Integer()),
+            postgresql_using=f"translate({col}, '[]', '{{}}')::integer[]",
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for col in _COLUMNS:
+        op.alter_column(
+            'trips', col,
+            existing_type=postgresql.ARRAY(sa.Integer()),
+            type_=sa.Text(),
+            postgresql_using=f'array_to_json({col})::text',
+        )
@@ -16,11 +16,17 @@ import json as _json
 from datetime import date, datetime, timezone
 
 from sqlalchemy import (
-    Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Text,
+    JSON, Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Text,
 )
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import declarative_base, relationship
 
 
+# Integer lists: native int[] on PostgreSQL (no JSON encode/decode on the
+# wire), a JSON column elsewhere. Both read and write plain Python lists.
+_IntList = JSON().with_variant(ARRAY(Integer), 'postgresql')
+
+
 def _utcnow():
     """Return the current UTC time as a timezone-aware datetime."""
     return datetime.now(timezone.utc)
@@ -260,9 +266,9 @@ class Trip(db):
     raw_attractions = Column(Text, nullable=True)
 
     # ── Approved selections (index arrays from /finalize) ───────────────────
-    approved_photo_indices      = Column(Text, nullable=True)   # JSON [0,2,4,...]
-    approved_restaurant_indices = Column(Text, nullable=True)
-    approved_attraction_indices = Column(Text, nullable=True)
+    approved_photo_indices      = Column(_IntList, nullable=True)   # [0,2,4,...]
+    approved_restaurant_indices = Column(_IntList, nullable=True)
+    approved_attraction_indices = Column(_IntList, nullable=True)
 
     # ── Final output ─────────────────────────────────────────────────────────
     final_html = Column(Text,        nullable=True)
@@ -320,9 +326,9 @@ class Trip(db):
             'raw_restaurants':      _json.loads(self.raw_restaurants) if self.raw_restaurants else [],
             'raw_attractions':      _json.loads(self.raw_attractions) if self.raw_attractions else [],
             # approved indices
-            'approved_photo_indices':       _json.loads(self.approved_photo_indices)       if self.approved_photo_indices       else None,
-            'approved_restaurant_indices':  _json.loads(self.approved_restaurant_indices)  if self.approved_restaurant_indices  else None,
-            'approved_attraction_indices':  _json.loads(self.approved_attraction_indices)  if self.approved_attraction_indices  else None,
+            'approved_photo_indices':       self.approved_photo_indices,
+            'approved_restaurant_indices':  self.approved_restaurant_indices,
+            'approved_attraction_indices':  self.approved_attraction_indices,
             # misc
             'colors':    _json.loads(self.colors) if self.colors else None,
             'session_id': self.session_id,
@@ -5,6 +5,10 @@ Every prompt constant and builder function lives here.
 app.py must not contain hardcoded prompt strings.
 
 Public API:
+    # Shared trip context (accommodation / pre-planned / client blocks)
+    build_trip_context_blocks(accommodation, pre_planned, client_profile)
+                                                           → (str, str, str)
+
     # Two-phase parallel photo scout (main generation path)
     build_location_scout_system_prompt()                   → str
     build_location_scout_user_prompt(...)                  → str
@@ -18,6 +22,8 @@ Public API:
     build_photo_replace_user_prompt(...)                   → str
 """
 
+from functools import lru_cache
+
 # ---------------------------------------------------------------------------
 # Internal helpers
 # ---------------------------------------------------------------------------
@@ -50,6 +56,25 @@ _FORBIDDEN_WORDS = (
 )
 
 
+# User-prompt fragments. Templates are module-level constants filled with
+# str.format, so per-call work is substitution only — no literal rescanning.
+_DEFAULT_INTERESTS  = 'general — landscapes, architecture, street'
+_DATE_LINE_TEMPLATE = '- Trip starts: {}\n'
+
+_ACCOMMODATION_BLOCK_TEMPLATE = (
+    '- Starting point: {}\n'
+    '  Calculate all distances and travel times from this starting point.\n'
+)
+_ACCOMMODATION_BLOCK_NONE = (
+    '- Starting point: not specified — use city centre as the assumed travel base.\n'
+)
+_PRE_PLANNED_BLOCK_TEMPLATE = (
+    'Already planned / committed:\n  {}\n'
+    '  Do NOT suggest anything that duplicates or conflicts with the above.\n'
+)
+_CLIENT_BLOCK_NONE = 'Client profile: none provided — give broadly appealing recommendations.\n'
+
+
 def _gear_block(gear_profile: dict | None) -> str:
     """Format a gear profile dict as a plain-text gear vault block."""
     if not gear_profile:
@@ -130,17 +155,63 @@ def _tripod_guidance(has_tripod: bool) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Phase 1 — Location Discovery (lightweight, geography-only, one call per day)
+# Shared trip-context blocks (interpolated into every scout user prompt)
 # ---------------------------------------------------------------------------
 
-def build_location_scout_system_prompt() -> str:
-    """System prompt for Phase 1 of the two-phase photo scout.
+def build_trip_context_blocks(
+    accommodation:  str | None,
+    pre_planned:    str | None,
+    client_profile: dict | None,
+) -> tuple[str, str, str]:
+    """Build the (accommodation_block, pre_planned_block, client_block) trio.
 
-    Deliberately lightweight — no gear block, no ephemeris, no shot details.
-    The sole job is finding real, photogenic, accessible locations.
-    Shot planning (Phase 2) is handled by build_shot_planner_system_prompt.
+    Built once per job and reused by every scout call in that job. Each block
+    is memoised, so regenerations for the same client / hotel / commitments
+    skip the formatting entirely.
     """
-    return f"""You are an expert travel photographer and location scout.
+    return (
+        _accommodation_block(accommodation),
+        _pre_planned_block(pre_planned),
+        _client_block(tuple(sorted((client_profile or {}).items()))),
+    )
+
+
+@lru_cache(maxsize=256)
+def _accommodation_block(accommodation: str | None) -> str:
+    if not accommodation:
+        return _ACCOMMODATION_BLOCK_NONE
+    return _ACCOMMODATION_BLOCK_TEMPLATE.format(accommodation)
+
+
+@lru_cache(maxsize=256)
+def _pre_planned_block(pre_planned: str | None) -> str:
+    return _PRE_PLANNED_BLOCK_TEMPLATE.format(pre_planned) if pre_planned else ''
+
+
+@lru_cache(maxsize=256)
+def _client_block(profile_items: tuple) -> str:
+    """Client profile block; profile_items is the sorted item tuple (hashable)."""
+    profile       = dict(profile_items)
+    profile_lines = []
+    if profile.get('travel_style'):
+        profile_lines.append(f"  Travel style: {profile['travel_style']}")
+    if profile.get('home_city'):
+        profile_lines.append(
+            f"  Home city: {profile['home_city']} — avoid locations similar to home; surprise them."
+        )
+    if profile.get('notes'):
+        profile_lines.append(f"  Consultant notes: {profile['notes']}")
+    if not profile_lines:
+        return _CLIENT_BLOCK_NONE
+    return 'Client profile:\n' + '\n'.join(profile_lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# Phase 1 — Location Discovery (lightweight, geography-only, one call per day)
+# ---------------------------------------------------------------------------
+
+# Fully static — rendered once at import and returned as-is on every call.
+_LOCATION_SCOUT_SYSTEM_PROMPT = f"""You are an expert travel photographer and location scout.
 Your job: find the best photogenic locations for one specific day of a trip.
 You are NOT writing shot instructions here — that comes in a separate step.
 Focus entirely on finding real, accessible, photogenic places.
@@ -161,6 +232,34 @@ WRITING RULES:
 Use the submit_locations tool to return locations for this day only."""
 
 
+def build_location_scout_system_prompt() -> str:
+    """System prompt for Phase 1 of the two-phase photo scout.
+
+    Deliberately lightweight — no gear block, no ephemeris, no shot details.
+    The sole job is finding real, photogenic, accessible locations.
+    Shot planning (Phase 2) is handled by build_shot_planner_system_prompt.
+    """
+    return _LOCATION_SCOUT_SYSTEM_PROMPT
+
+
+_LOCATION_SCOUT_USER_TEMPLATE = """Find {per_day} photography location(s) for Day {day} of this trip.
+
+Trip details:
+- Destination: {location}
+- Day: {day}
+{date_line}- Photography interests: {interests}
+- Max travel radius: {distance}
+{accommodation_block}
+{pre_planned_block}
+{client_block}
+{exclude_block}Return exactly {per_day} location(s). Set day={day} on every location."""
+
+# Top-up calls: the day came back short, so ask only for the missing count.
+_LOCATION_SCOUT_EXCLUDE_TEMPLATE = (
+    'Already chosen for this day — do NOT repeat any of these:\n{}\n'
+)
+
+
 def build_location_scout_user_prompt(
     day:                 int,
     location:            str,
@@ -171,47 +270,46 @@ def build_location_scout_user_prompt(
     pre_planned_block:   str,
     client_block:        str,
     start_date:          str | None = None,
+    exclude_names:       list[str] | None = None,
 ) -> str:
-    """User prompt for Phase 1 — one trip day at a time."""
-    date_line = f'- Trip starts: {start_date}\n' if start_date else ''
-    return f"""Find {per_day} photography location(s) for Day {day} of this trip.
+    """User prompt for Phase 1 — one trip day at a time.
 
-Trip details:
-- Destination: {location}
-- Day: {day}
-{date_line}- Photography interests: {interests or 'general — landscapes, architecture, street'}
-- Max travel radius: {distance}
-{accommodation_block}
-{pre_planned_block}
-{client_block}
-Return exactly {per_day} location(s). Set day={day} on every location."""
+    exclude_names is set on top-up calls, where per_day is the missing count
+    and the names already found for the day must not come back again.
+    """
+    exclude_block = _LOCATION_SCOUT_EXCLUDE_TEMPLATE.format(
+        '\n'.join(f'  - {n}' for n in exclude_names)
+    ) if exclude_names else ''
+    return _LOCATION_SCOUT_USER_TEMPLATE.format(
+        day                 = day,
+        location            = location,
+        per_day             = per_day,
+        date_line           = _DATE_LINE_TEMPLATE.format(start_date) if start_date else '',
+        interests           = interests or _DEFAULT_INTERESTS,
+        distance            = distance,
+        accommodation_block = accommodation_block,
+        pre_planned_block   = pre_planned_block,
+        client_block        = client_block,
+        exclude_block       = exclude_block,
+    )
 
 
 # ---------------------------------------------------------------------------
 # Phase 2 — Shot Planning (creative/technical detail, one call per location)
 # ---------------------------------------------------------------------------
 
-def build_shot_planner_system_prompt(gear_profile: dict | None = None) -> str:
-    """System prompt for Phase 2 of the two-phase photo scout.
-
-    Shares the Scott Kelby persona and gear helpers with the legacy
-    build_photo_scout_system_prompt. Scoped to a single confirmed location.
-    """
-    gear_section  = _gear_block(gear_profile)
-    camera_type   = (gear_profile or {}).get('camera_type', '')
-    settings_rule = _settings_guidance(camera_type)
-    tripod_rule   = _tripod_guidance(bool((gear_profile or {}).get('has_tripod')))
-
-    return f"""You are Scott Kelby — the world's most practical photography instructor.
+# Static text rendered once at import; only the gear-dependent slots
+# ({gear_section}, {settings_rule}, {tripod_rule}) are filled per call.
+_SHOT_PLANNER_SYSTEM_TEMPLATE = f"""You are Scott Kelby — the world's most practical photography instructor.
 You write shot plans for a single confirmed photography location.
 Be specific, honest, and technically exact. No fluff. No travel-brochure language.
 
-{gear_section}
+{{gear_section}}
 GEAR RULES:
 - The Setup section MUST reference the lens category and its focal range from the vault.
   "Use the Wide to Standard (24–70mm) zoom at the wide end" — not just "use a wide lens".
-- {settings_rule}
-- {tripod_rule}
+- {{settings_rule}}
+- {{tripod_rule}}
 - Only recommend filters the photographer actually owns.
 - required_gear must list ONLY items from their vault that any shot genuinely needs.
   Use category names (e.g. "Telephoto Zoom", "tripod") — not focal lengths.
@@ -229,7 +327,7 @@ Do NOT paraphrase the same shot. If a shot requires a lens they don't own, skip
   the_shot:      One sharp paragraph. What are you pointing at and why does it work?
                  Lead with the subject. State what makes this specific angle compelling.
   the_setup:     Exact position. Lens category + focal range from vault. Framing technique.
-  the_settings:  {settings_rule}  One concrete starting point per shot.
+  the_settings:  {{settings_rule}}  One concrete starting point per shot.
 
 the_reality_check (one entry for the whole location — shared across shots):
   Honest logistics: crowds, sun direction at the actual shoot time, parking,
@@ -252,6 +350,37 @@ WRITING RULES:
 Use the submit_shot_plan tool to return the plan for this single location."""
 
 
+def build_shot_planner_system_prompt(gear_profile: dict | None = None) -> str:
+    """System prompt for Phase 2 of the two-phase photo scout.
+
+    Shares the Scott Kelby persona and gear helpers with the legacy
+    build_photo_scout_system_prompt. Scoped to a single confirmed location.
+    """
+    gear_section  = _gear_block(gear_profile)
+    camera_type   = (gear_profile or {}).get('camera_type', '')
+    settings_rule = _settings_guidance(camera_type)
+    tripod_rule   = _tripod_guidance(bool((gear_profile or {}).get('has_tripod')))
+
+    return _SHOT_PLANNER_SYSTEM_TEMPLATE.format(
+        gear_section  = gear_section,
+        settings_rule = settings_rule,
+        tripod_rule   = tripod_rule,
+    )
+
+
+_SHOT_PLANNER_USER_TEMPLATE = """Plan shots for this confirmed photography location.
+
+Location: {location_name}
+Address: {address}
+Trip day: {day}
+Photography interests: {interests}
+
+{ephemeris_block}
+Give 1–3 concrete, achievable shots using only lenses from the gear vault above.
+Set shoot_window using the ephemeris data provided.
+Use the submit_shot_plan tool."""
+
+
 def build_shot_planner_user_prompt(
     location_name:   str,
     address:         str,
@@ -264,42 +393,31 @@ def build_shot_planner_user_prompt(
     ephemeris_block should be pre-formatted via format_ephemeris_block([day_dict])
     before being passed here. Pass an empty string if no ephemeris is available.
     """
-    return f"""Plan shots for this confirmed photography location.
-
-Location: {location_name}
-Address: {address}
-Trip day: {day}
-Photography interests: {interests or 'general — landscapes, architecture, street'}
-
-{ephemeris_block}
-Give 1–3 concrete, achievable shots using only lenses from the gear vault above.
-Set shoot_window using the ephemeris data provided.
-Use the submit_shot_plan tool."""
+    return _SHOT_PLANNER_USER_TEMPLATE.format(
+        location_name   = location_name,
+        address         = address,
+        day             = day,
+        interests       = interests or _DEFAULT_INTERESTS,
+        ephemeris_block = ephemeris_block,
+    )
 
 
 # ---------------------------------------------------------------------------
 # Photo scout — main guide generation (legacy single-call path)
 # ---------------------------------------------------------------------------
 
-def build_photo_scout_system_prompt(gear_profile: dict | None = None) -> str:
-    """Build the system prompt for the Kelby-style photography location scout."""
-    gear_section = _gear_block(gear_profile)
-    camera_type  = (gear_profile or {}).get('camera_type', '')
-
-    settings_rule = _settings_guidance(camera_type)
-    tripod_rule   = _tripod_guidance(bool((gear_profile or {}).get('has_tripod')))
-
-    return f"""You are Scott Kelby — the world's most practical photography instructor.
+# Same slot layout as _SHOT_PLANNER_SYSTEM_TEMPLATE.
+_PHOTO_SCOUT_SYSTEM_TEMPLATE = f"""You are Scott Kelby — the world's most practical photography instructor.
 You write location guides for real photographers: specific, honest, technically exact.
 No fluff. No travel-brochure language. Just what the photographer needs to nail the shot.
 
-{gear_section}
+{{gear_section}}
 GEAR RULES:
 - The Setup section MUST reference the lens category and its focal range from the vault.
   "Use the Wide to Standard (24–70mm) zoom at the wide end" — not just "use a wide lens".
   If they have Ultra-Wide Angle (10–20mm), call it out specifically for architecture/interiors.
-- {settings_rule}
-- {tripod_rule}
+- {{settings_rule}}
+- {{tripod_rule}}
 - Only recommend filters the photographer actually owns.
 - required_gear must list ONLY items from their vault that any shot at this location needs.
   Use category names (e.g. "Telephoto Zoom", "tripod") — not focal lengths.
@@ -322,7 +440,7 @@ shots (array of 2–3):
                  Lead with the subject. State what makes this specific angle compelling.
   the_setup:     Exact position. Lens category + focal range from vault. Framing technique.
                  "Stand at the north end. Use the Wide to Standard (24–70mm) at 24mm..."
-  the_settings:  {settings_rule}  One concrete starting point per shot.
+  the_settings:  {{settings_rule}}  One concrete starting point per shot.
 
 the_reality_check (shared for all shots at this location):
   Honest logistics. Crowds, sun direction at the actual shoot time, parking,
@@ -347,28 +465,27 @@ WRITING RULES:
 Use the submit_photo_locations tool to return all locations."""
 
 
-def build_photo_scout_user_prompt(
-    location:            str,
-    duration:            int,
-    per_day:             int,
-    interests:           str,
-    distance:            str,
-    accommodation_block: str,
-    pre_planned_block:   str,
-    client_block:        str,
-    ephemeris_block:     str,
-    start_date:          str | None = None,
-) -> str:
-    """Build the user prompt for the Kelby-style photography location scout."""
-    count     = duration * per_day
-    date_line = f'- Trip starts: {start_date}\n' if start_date else ''
+def build_photo_scout_system_prompt(gear_profile: dict | None = None) -> str:
+    """Build the system prompt for the Kelby-style photography location scout."""
+    gear_section = _gear_block(gear_profile)
+    camera_type  = (gear_profile or {}).get('camera_type', '')
 
-    return f"""Plan {count} photography shoots ({per_day} per day across {duration} days).
+    settings_rule = _settings_guidance(camera_type)
+    tripod_rule   = _tripod_guidance(bool((gear_profile or {}).get('has_tripod')))
+
+    return _PHOTO_SCOUT_SYSTEM_TEMPLATE.format(
+        gear_section  = gear_section,
+        settings_rule = settings_rule,
+        tripod_rule   = tripod_rule,
+    )
+
+
+_PHOTO_SCOUT_USER_TEMPLATE = """Plan {count} photography shoots ({per_day} per day across {duration} days).
 
 Trip details:
 - Destination: {location}
 - Duration: {duration} days
-{date_line}- Photography interests: {interests or 'general — landscapes, architecture, street'}
+{date_line}- Photography interests: {interests}
 - Max travel radius: {distance}
 {accommodation_block}
 {pre_planned_block}
@@ -379,20 +496,59 @@ For each location, set shoot_window using the actual ephemeris times above, \
 converted to local destination time."""
 
 
+def build_photo_scout_user_prompt(
+    location:            str,
+    duration:            int,
+    per_day:             int,
+    interests:           str,
+    distance:            str,
+    accommodation_block: str,
+    pre_planned_block:   str,
+    client_block:        str,
+    ephemeris_block:     str,
+    start_date:          str | None = None,
+) -> str:
+    """Build the user prompt for the Kelby-style photography location scout."""
+    return _PHOTO_SCOUT_USER_TEMPLATE.format(
+        count               = duration * per_day,
+        per_day             = per_day,
+        duration            = duration,
+        location            = location,
+        date_line           = _DATE_LINE_TEMPLATE.format(start_date) if start_date else '',
+        interests           = interests or _DEFAULT_INTERESTS,
+        distance            = distance,
+        accommodation_block = accommodation_block,
+        pre_planned_block   = pre_planned_block,
+        client_block        = client_block,
+        ephemeris_block     = ephemeris_block,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Photo scout — /replace endpoint (single swap)
 # ---------------------------------------------------------------------------
 
+_PHOTO_REPLACE_SYSTEM_PROMPT = (
+    'You are a photography location scout. Find ONE real, currently accessible '
+    'photography location that has NOT already been suggested for this trip. '
+    'Be specific: name the exact spot and include 2–3 distinct shooting approaches '
+    'in the shots array (different lens categories, vantage points, or subject elements). '
+    'Each shot must reference lens categories by name and focal range. '
+    'Shared logistics go in the_reality_check at location level.'
+)
+
+
 def build_photo_replace_system_prompt() -> str:
     """System prompt for the /replace endpoint — single photo location swap."""
-    return (
-        'You are a photography location scout. Find ONE real, currently accessible '
-        'photography location that has NOT already been suggested for this trip. '
-        'Be specific: name the exact spot and include 2–3 distinct shooting approaches '
-        'in the shots array (different lens categories, vantage points, or subject elements). '
-        'Each shot must reference lens categories by name and focal range. '
-        'Shared logistics go in the_reality_check at location level.'
-    )
+    return _PHOTO_REPLACE_SYSTEM_PROMPT
+
+
+_PHOTO_REPLACE_USER_TEMPLATE = """Find one photography location in {location}.
+
+{exclude_block}Context: Day {day} of a {duration}-day trip.
+Photography interests: {interests}
+Max travel radius: {distance}
+Set day={day} and distance_from_accommodation="N/A"."""
 
 
 def build_photo_replace_user_prompt(
@@ -404,9 +560,11 @@ def build_photo_replace_user_prompt(
     exclude_block: str,
 ) -> str:
     """User prompt for the /replace endpoint."""
-    return f"""Find one photography location in {location}.
-
-{exclude_block}Context: Day {day} of a {duration}-day trip.
-Photography interests: {interests or 'general'}
-Max travel radius: {distance}
-Set day={day} and distance_from_accommodation="N/A"."""
+    return _PHOTO_REPLACE_USER_TEMPLATE.format(
+        location      = location,
+        day           = day,
+        duration      = duration,
+        interests     = interests or 'general',
+        distance      = distance,
+        exclude_block = exclude_block,
+    )
@@ -8,6 +8,7 @@ Covers:
   • POST /auth/login  (bad password)  → 401
   • POST /auth/login  (wrong email)   → 401
   • POST /auth/login  (empty body)    → 422
+  • GET  /auth/me  after deactivation + invalidate_user → 401
 """
 import pytest
 from auth import COOKIE_NAME
@@ -46,7 +47,7 @@ async def test_gear_profiles_requires_auth(anon_client):
 
 
 @pytest.mark.asyncio
-async def test_login_success(anon_client, test_user):
+async def test_login_success(anon_client, test_user, db_session):
     """POST /auth/login with correct credentials returns 200 and sets the cookie."""
     response = await anon_client.post(
         "/auth/login",
@@ -59,6 +60,9 @@ async def test_login_success(anon_client, test_user):
     assert data["user"]["email"] == test_user.email
     # The JWT cookie must be present
     assert COOKIE_NAME in response.cookies
+    # last_login_at is written by a background task after the response
+    db_session.refresh(test_user)
+    assert test_user.last_login_at is not None
 
 
 # ---------------------------------------------------------------------------
@@ -140,3 +144,22 @@ async def test_csrf_guard_on_protected_post(anon_client, test_user):
         # No X-Requested-With header
     )
     assert response.status_code == 403
+
+
+# ---------------------------------------------------------------------------
+# Cached session snapshot is dropped by invalidate_user
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_drops_cached_session(auth_client, test_user, db_session):
+    from auth import invalidate_user
+
+    assert (await auth_client.get("/auth/me")).status_code == 200
+
+    test_user.is_active = False
+    db_session.commit()
+    invalidate_user(test_user.id)
+
+    response = await auth_client.get("/auth/me")
+    assert response.status_code == 401
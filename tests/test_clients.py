@@ -14,6 +14,7 @@ Covers:
   • POST /gear-profiles (invalid camera_type) → 422
   • DELETE /gear-profiles/{other_id}  → 404 (cross-user isolation)
   • All CRUD endpoints without auth   → 401
+  • GET  /clients  (streamed, several batches) → valid JSON with every client
 """
 import uuid
 
@@ -264,3 +265,26 @@ async def test_full_crud_cycle(auth_client):
     r = await auth_client.get("/gear-profiles")
     ids = [p["id"] for p in r.json()["gear_profiles"]]
     assert gp_id not in ids
+
+
+# ---------------------------------------------------------------------------
+# GET /clients — streamed body is one valid JSON document across batches
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_list_clients_streams_all_batches(auth_client, monkeypatch):
+    import clients as clients_module
+    monkeypatch.setattr(clients_module, "CLIENT_STREAM_BATCH", 2)
+
+    tag   = uuid.uuid4().hex[:8]
+    names = [f"Client {tag} {i}" for i in range(5)]
+    for name in names:
+        r = await auth_client.post("/clients", json={"name": name})
+        assert r.status_code == 201, r.text
+
+    r = await auth_client.get("/clients")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/json")
+    listed = [c["name"] for c in r.json()["clients"]]
+    assert set(names) <= set(listed)
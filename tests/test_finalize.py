@@ -6,7 +6,7 @@ so map prefetching is skipped and _http_client is never called.
 
 Session injection strategy
 --------------------------
-The session store (app._session_store) is a plain dict used as the Redis
+The session store (app._session_store) is a TTLCache used as the Redis
 fallback.  We inject fake sessions directly before calling /finalize so no
 background scout task or real API call is needed.
 
@@ -16,13 +16,16 @@ Covers:
   • POST /finalize  (nonexistent session_id)          → 404
   • POST /finalize  (injected session, all photos)    → 200, html key present
   • POST /finalize  (injected session, subset photos) → 200, correct photo_count
+  • POST /finalize  (session only in DB draft trip)    → 200, resolved from DB
 """
+import json
 import time
 import uuid
 
 import pytest
 
 import app as app_module
+from models import Trip
 
 
 # ---------------------------------------------------------------------------
@@ -155,6 +158,30 @@ async def test_finalize_all_photos(auth_client):
         _clear_session(session_id)
 
 
+# ---------------------------------------------------------------------------
+# Accept: text/html → raw document body, metadata in X-* headers
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_finalize_html_accept(auth_client):
+    session_id = str(uuid.uuid4())
+    _inject_session(session_id)
+    try:
+        response = await auth_client.post(
+            "/finalize",
+            json={"session_id": session_id, "approved_photos": [0, 1]},
+            headers={"Accept": "text/html"},
+        )
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.text.lstrip().lower().startswith("<!doctype html")
+        assert response.headers["x-location"] == "Barcelona"
+        assert response.headers["x-photo-count"] == "2"
+    finally:
+        _clear_session(session_id)
+
+
 # ---------------------------------------------------------------------------
 # Valid injected session — subset of photos approved
 # ---------------------------------------------------------------------------
@@ -223,3 +250,34 @@ async def test_finalize_html_is_valid_html(auth_client):
         assert "Barcelona" in html
     finally:
         _clear_session(session_id)
+
+
+# ---------------------------------------------------------------------------
+# Session expired from the store — resolved from the saved draft trip
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_finalize_falls_back_to_db_trip(auth_client, db_session):
+    session_id = str(uuid.uuid4())
+    trip = Trip(
+        location="Barcelona",
+        duration=2,
+        status="draft",
+        session_id=session_id,
+        raw_photos=json.dumps(_FAKE_PHOTOS),
+        colors=json.dumps({"primary": "#c41e3a", "accent": "#f4a261"}),
+    )
+    db_session.add(trip)
+    db_session.commit()
+
+    # Finalize twice: the second request reuses the decoded raw_photos column
+    for approved in ([0, 1], [1]):
+        response = await auth_client.post(
+            "/finalize",
+            json={"session_id": session_id, "approved_photos": approved},
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["photo_count"] == len(approved)
+        assert "Barceloneta Beach" in data["html"]
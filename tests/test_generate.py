@@ -15,11 +15,17 @@ Covers:
   • POST /generate  (missing duration+dates)  → 422
   • GET  /jobs/{job_id}  (just-created job)   → 200, status in known set
   • GET  /jobs/nonexistent-uuid               → 404
+  • GET  /jobs/{job_id}?wait=N                → returns when the job changes
+  • _job_claim (idempotency key)              → reuses only in-flight jobs
 """
 import asyncio
+import time
+import uuid
 
 import pytest
 
+import app as app_module
+
 
 VALID_BODY = {
     "location": "Barcelona",
@@ -181,3 +187,49 @@ async def test_poll_job_requires_auth(auth_client, anon_client):
 
     response = await anon_client.get(f"/jobs/{job_id}")
     assert response.status_code == 401
+
+
+# ---------------------------------------------------------------------------
+# Job polling — ?wait= long-poll returns as soon as the job changes
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_poll_job_wait_returns_on_update(auth_client):
+    job_id = str(uuid.uuid4())
+    app_module._job_set(job_id, {
+        "status": "running", "progress": 10, "message": "Working…",
+        "results": None, "error": None,
+    })
+
+    async def _advance():
+        await asyncio.sleep(0.1)
+        app_module._job_update(job_id, {"progress": 50, "message": "Halfway…"})
+
+    updater = asyncio.create_task(_advance())
+    started = time.monotonic()
+    response = await auth_client.get(f"/jobs/{job_id}?wait=10")
+    await updater
+
+    assert response.status_code == 200
+    assert response.json()["progress"] == 50
+    assert time.monotonic() - started < 5
+
+
+# ---------------------------------------------------------------------------
+# Idempotency — a key maps to its job only while that job is in flight
+# ---------------------------------------------------------------------------
+
+
+def test_job_claim_reuses_in_flight_job():
+    key    = f"test:{uuid.uuid4()}"
+    job_id = str(uuid.uuid4())
+    assert app_module._job_claim(key, job_id) is None
+
+    app_module._job_set(job_id, {"status": "running", "progress": 5, "message": "",
+                                 "results": None, "error": None})
+    assert app_module._job_claim(key, str(uuid.uuid4())) == job_id
+
+    app_module._job_set(job_id, {"status": "failed", "progress": 0, "message": "",
+                                 "results": None, "error": "boom"})
+    assert app_module._job_claim(key, str(uuid.uuid4())) is None
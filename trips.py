@@ -23,9 +23,9 @@ from sqlalchemy.orm import Session
 from starlette.concurrency import run_in_threadpool
 
 from database import get_db
-from auth import get_current_user
+from auth import CurrentUser, get_current_user
 from schemas import TripCreate, TripUpdate
-from models import Trip, Client, StaffUser
+from models import Trip, Client
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +51,7 @@ def _auto_title(location: str, duration: int) -> str:
 async def list_trips(
     client_id: Optional[int] = Query(default=None),
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """GET /trips[?client_id=N] — list non-deleted trips, newest first."""
     def _query():
@@ -68,7 +68,7 @@ async def list_trips(
 async def create_trip(
     body: TripCreate,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     POST /trips — save a trip draft immediately after /generate returns.
@@ -120,7 +120,7 @@ async def get_trip(
     trip_id: int,
     include_html: bool = Query(default=False),
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """GET /trips/{id} — full trip including raw suggestions."""
     trip = await run_in_threadpool(lambda: _trip_or_404(db, trip_id))
@@ -132,7 +132,7 @@ async def update_trip(
     trip_id: int,
     body: TripUpdate,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     PUT /trips/{id} — partial update.
@@ -165,13 +165,13 @@ async def update_trip(
                     raise HTTPException(status_code=404, detail='Client not found')
                 trip.client_id = body.client_id
 
-        # Approved index arrays (stored as JSON strings)
+        # Approved index arrays (int[] on PostgreSQL, JSON elsewhere)
         if 'approved_photo_indices' in sent and body.approved_photo_indices is not None:
-            trip.approved_photo_indices = json.dumps(body.approved_photo_indices)
+            trip.approved_photo_indices = body.approved_photo_indices
         if 'approved_restaurant_indices' in sent and body.approved_restaurant_indices is not None:
-            trip.approved_restaurant_indices = json.dumps(body.approved_restaurant_indices)
+            trip.approved_restaurant_indices = body.approved_restaurant_indices
         if 'approved_attraction_indices' in sent and body.approved_attraction_indices is not None:
-            trip.approved_attraction_indices = json.dumps(body.approved_attraction_indices)
+            trip.approved_attraction_indices = body.approved_attraction_indices
 
         # Final HTML (potentially large)
         if 'final_html' in sent:
@@ -191,7 +191,7 @@ async def update_trip(
 async def delete_trip(
     trip_id: int,
     db: Session = Depends(get_db),
-    current_user: StaffUser = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """DELETE /trips/{id} — soft-delete."""
     def _delete():